@@ -0,0 +1,145 @@
+"""
+Out-of-core day1 for inputs larger than memory.
+
+The input is read in chunks of whole lines. Each chunk's left and right
+columns are sorted and written to temporary files as raw int64 runs. Each
+column's runs are then k-way merged (`heapq.merge`) while buffered reads keep
+memory bounded:
+
+- the distance zips the merged left and right streams in lockstep;
+- the similarity walks both merged streams as a merge join, counting each
+  right value's occurrences as its group streams past, so no frequency table
+  of the whole column is ever held.
+
+Memory stays around one chunk plus one read buffer per run.
+
+    python external_sort.py [INPUT] [--chunk-mb 64] [--tmpdir DIR]
+"""
+
+import argparse
+import heapq
+import pathlib
+import tempfile
+from array import array
+from itertools import groupby
+from typing import Iterator, List, Optional, Tuple
+
+current_dir = pathlib.Path(__file__).parent.resolve()
+input_data_path = current_dir.joinpath("input.txt")
+
+
+def read_chunks(
+    input_path: pathlib.Path, chunk_bytes: int = 64 << 20
+) -> Iterator[Tuple[array, array]]:
+    """
+    Yield (left, right) columns for consecutive chunks of whole lines.
+    """
+    tail = b""
+    with open(input_path, "rb") as input_file:
+        while True:
+            block = input_file.read(chunk_bytes)
+            if not block:
+                break
+            block = tail + block
+            cut = block.rfind(b"\n") + 1
+            if cut == 0:
+                # no complete line yet, keep reading
+                tail = block
+                continue
+            tail = block[cut:]
+            yield _columns(block[:cut])
+    if tail.strip():
+        yield _columns(tail)
+
+
+def _columns(lines: bytes) -> Tuple[array, array]:
+    values = array("q", map(int, lines.split()))
+    if len(values) % 2:
+        raise ValueError("every line needs a left and a right location ID")
+    return values[0::2], values[1::2]
+
+
+def _write_run(values: array, directory: pathlib.Path, name: str) -> pathlib.Path:
+    path = directory.joinpath(name)
+    with open(path, "wb") as run_file:
+        array("q", sorted(values)).tofile(run_file)
+    return path
+
+
+def read_run(path: pathlib.Path, buffer_items: int = 1 << 13) -> Iterator[int]:
+    with open(path, "rb") as run_file:
+        while True:
+            buffer = array("q")
+            try:
+                buffer.fromfile(run_file, buffer_items)
+            except EOFError:
+                # the last, partial buffer is still filled before the error
+                yield from buffer
+                return
+            yield from buffer
+
+
+def sorted_runs(
+    input_path: pathlib.Path, directory: pathlib.Path, chunk_bytes: int = 64 << 20
+) -> Tuple[List[pathlib.Path], List[pathlib.Path]]:
+    left_runs, right_runs = [], []
+    for i, (left, right) in enumerate(read_chunks(input_path, chunk_bytes)):
+        left_runs.append(_write_run(left, directory, f"left-{i}.run"))
+        right_runs.append(_write_run(right, directory, f"right-{i}.run"))
+    return left_runs, right_runs
+
+
+def merged(runs: List[pathlib.Path]) -> Iterator[int]:
+    return heapq.merge(*(read_run(path) for path in runs))
+
+
+def distance(left_runs: List[pathlib.Path], right_runs: List[pathlib.Path]) -> int:
+    s = 0
+    for n1, n2 in zip(merged(left_runs), merged(right_runs)):
+        s += abs(n1 - n2)
+    return s
+
+
+def similarity(left_runs: List[pathlib.Path], right_runs: List[pathlib.Path]) -> int:
+    s = 0
+    rights = groupby(merged(right_runs))
+    right_value, right_group = next(rights, (None, None))
+    right_count = sum(1 for _ in right_group) if right_group is not None else 0
+
+    for n, left_group in groupby(merged(left_runs)):
+        # advance the right stream to the first value >= n, counting as we go
+        while right_value is not None and right_value < n:
+            right_value, right_group = next(rights, (None, None))
+            if right_group is not None:
+                right_count = sum(1 for _ in right_group)
+        if right_value is None:
+            break
+        if right_value == n:
+            s += n * right_count * sum(1 for _ in left_group)
+    return s
+
+
+def solve(
+    input_path: pathlib.Path,
+    chunk_bytes: int = 64 << 20,
+    tmpdir: Optional[pathlib.Path] = None,
+) -> Tuple[int, int]:
+    with tempfile.TemporaryDirectory(dir=tmpdir, prefix="day1-runs-") as directory:
+        left_runs, right_runs = sorted_runs(
+            input_path, pathlib.Path(directory), chunk_bytes
+        )
+        return distance(left_runs, right_runs), similarity(left_runs, right_runs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("input", nargs="?", type=pathlib.Path, default=input_data_path)
+    parser.add_argument("--chunk-mb", type=float, default=64, help="input per run")
+    parser.add_argument("--tmpdir", type=pathlib.Path, help="where runs are written")
+    args = parser.parse_args()
+
+    list_distance, similarity_score = solve(
+        args.input, int(args.chunk_mb * (1 << 20)), args.tmpdir
+    )
+    print("List distance:", list_distance)
+    print("Similarity score:", similarity_score)
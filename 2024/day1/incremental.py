@@ -0,0 +1,275 @@
+"""
+Day1 scores kept up to date while location-ID pairs are appended or retracted.
+
+Similarity is sum(v * left_count[v] * right_count[v]). Adding or removing one
+value changes exactly one product term, so it is maintained exactly in O(1).
+
+For distance, with F_L(x) and F_R(x) the number of left and right IDs <= x,
+the sum of |sorted left - sorted right| equals the integral of
+|F_L(x) - F_R(x)| over x, since both columns have the same length. A pair
+(l, r) only shifts F_L - F_R by +/-1 on the interval between l and r. The
+distance therefore changes by that interval's length, counted +1 where the
+difference moves away from zero and -1 where it moves towards it.
+`_GapProfile` keeps the step function in blocks of about sqrt(n) pieces that
+answer "how long is the part >= 0" in O(log n). A pair costs amortized
+O(sqrt(n) log n) for n distinct IDs present, however far apart l and r are.
+
+    python incremental.py [INPUT | -]
+"""
+
+import math
+import pathlib
+import sys
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from itertools import accumulate
+from operator import sub
+from typing import Dict, Iterable, List, Tuple
+
+current_dir = pathlib.Path(__file__).parent.resolve()
+input_data_path = current_dir.joinpath("input.txt")
+
+
+class _Block:
+    """
+    A run of consecutive pieces of F_L - F_R: piece i starts at starts[i] and
+    has the value gaps[i] + lazy up to the next piece (or the block's end).
+    """
+
+    __slots__ = ("starts", "gaps", "lazy", "_end", "_keys", "_at_least")
+
+    def __init__(self, starts: List[int], gaps: List[int], lazy: int = 0):
+        self.starts = starts
+        self.gaps = gaps
+        self.lazy = lazy
+        self._end = None
+
+    def touched(self):
+        self._end = None
+
+    def length_at_least(self, threshold: int, end: int) -> int:
+        """
+        Total length of the pieces whose value is >= threshold.
+        """
+        if self._end != end:
+            # value -> length, then suffix sums over the sorted values
+            ends = self.starts[1:]
+            ends.append(end)
+            lengths: Dict[int, int] = {}
+            for gap, length in zip(self.gaps, map(sub, ends, self.starts)):
+                lengths[gap] = lengths.get(gap, 0) + length
+            self._keys = sorted(lengths)
+            suffix = accumulate(
+                map(lengths.__getitem__, reversed(self._keys)), initial=0
+            )
+            self._at_least = list(suffix)[::-1]
+            self._end = end
+        return self._at_least[bisect_left(self._keys, threshold - self.lazy)]
+
+
+class _GapProfile:
+    """
+    F_L(x) - F_R(x) as a step function, split into blocks of at most
+    2 * block_size pieces.
+
+    Adjacent pieces never have the same value, so there is at most one piece
+    per distinct ID present. After every p / 2 pieces added or removed, p
+    being the count at the last rebalance, the blocks are rebuilt with
+    block_size about sqrt(p), at O(1) amortized cost. Adding +/-1 over a range
+    then costs O(log n) for each of the O(sqrt(n)) blocks the range covers
+    completely, plus O(sqrt(n) log n) for the two blocks at its ends.
+    """
+
+    def __init__(self, min_block_size: int = 64):
+        self.min_block_size = min_block_size
+        self.block_size = min_block_size
+        self.blocks: List[_Block] = []
+        self.block_starts: List[int] = []
+        # pieces added or removed before the next rebalance
+        self._changes_left = min_block_size
+
+    def _split_at(self, x: int):
+        """
+        Make sure a piece starts at x. Nothing to the left of all pieces or
+        past the last one is ever non-zero.
+        """
+        if not self.blocks or x < self.block_starts[0]:
+            if self.blocks:
+                block = self.blocks[0]
+                block.starts.insert(0, x)
+                block.gaps.insert(0, -block.lazy)
+                block.touched()
+                self.block_starts[0] = x
+            else:
+                self.blocks.append(_Block([x], [0]))
+                self.block_starts.append(x)
+            k, block = 0, self.blocks[0]
+        else:
+            k = bisect_right(self.block_starts, x) - 1
+            block = self.blocks[k]
+            i = bisect_right(block.starts, x) - 1
+            if block.starts[i] == x:
+                return
+            block.starts.insert(i + 1, x)
+            block.gaps.insert(i + 1, block.gaps[i])
+            block.touched()
+        self._changes_left -= 1
+
+        if len(block.starts) > 2 * self.block_size:
+            half = self.block_size
+            tail = _Block(block.starts[half:], block.gaps[half:], block.lazy)
+            del block.starts[half:], block.gaps[half:]
+            block.touched()
+            self.blocks.insert(k + 1, tail)
+            self.block_starts.insert(k + 1, tail.starts[0])
+
+    def _merge_at(self, x: int):
+        """
+        Drop the piece starting at x if it has the same value as the piece
+        before it, or is 0 with nothing before it.
+        """
+        k = bisect_right(self.block_starts, x) - 1
+        if k < 0:
+            return
+        block = self.blocks[k]
+        i = bisect_left(block.starts, x)
+        if i == len(block.starts) or block.starts[i] != x:
+            return
+        if i:
+            before = block.gaps[i - 1] + block.lazy
+        elif k:
+            before = self.blocks[k - 1].gaps[-1] + self.blocks[k - 1].lazy
+        else:
+            before = 0
+        if block.gaps[i] + block.lazy != before:
+            return
+
+        del block.starts[i], block.gaps[i]
+        block.touched()
+        self._changes_left -= 1
+        if not block.starts:
+            del self.blocks[k], self.block_starts[k]
+        elif i == 0:
+            self.block_starts[k] = block.starts[0]
+
+    def _rebalance(self):
+        starts: List[int] = []
+        gaps: List[int] = []
+        for block in self.blocks:
+            starts += block.starts
+            gaps += [gap + block.lazy for gap in block.gaps]
+        size = max(self.min_block_size, math.isqrt(len(starts)))
+        self.block_size = size
+        self.blocks = [
+            _Block(starts[i : i + size], gaps[i : i + size])
+            for i in range(0, len(starts), size)
+        ]
+        self.block_starts = starts[::size]
+        self._changes_left = max(len(starts) // 2, size)
+
+    def shift(self, low: int, high: int, sign: int) -> int:
+        """
+        Add `sign` to the function on [low, high) and return how much the
+        integral of its absolute value changes.
+        """
+        self._split_at(low)
+        self._split_at(high)
+        change = 0
+        k = bisect_right(self.block_starts, low) - 1
+        # each block runs up to the next one's start, the last one forever
+        ends = self.block_starts[k + 1 :] + [float("inf")]
+        for block, start, end in zip(self.blocks[k:], self.block_starts[k:], ends):
+            if start >= high:
+                break
+            if low <= start and end <= high:
+                total = end - start
+                if sign > 0:
+                    # moving away from zero where the value is >= 0
+                    away = block.length_at_least(0, end)
+                else:
+                    away = total - block.length_at_least(1, end)
+                change += 2 * away - total
+                block.lazy += sign
+            else:
+                starts, gaps = block.starts, block.gaps
+                # pieces i..j-1 are in the range; there is at least one, as
+                # pieces start at low and high
+                i, j = bisect_left(starts, low), bisect_left(starts, high)
+                piece_ends = starts[i + 1 : j + 1]
+                if j == len(starts):
+                    piece_ends.append(end)
+                total = piece_ends[-1] - starts[i]
+                pieces = zip(gaps[i:j], starts[i:j], piece_ends)
+                if sign > 0:
+                    away = sum(e - s for gap, s, e in pieces if gap + block.lazy >= 0)
+                else:
+                    away = sum(e - s for gap, s, e in pieces if gap + block.lazy <= 0)
+                change += 2 * away - total
+                gaps[i:j] = [gap + sign for gap in gaps[i:j]]
+                block.touched()
+
+        # the values only changed relative to their neighbours at low and high
+        self._merge_at(high)
+        self._merge_at(low)
+        if self._changes_left <= 0:
+            self._rebalance()
+        return change
+
+
+class IncrementalScorer:
+    def __init__(self, pairs: Iterable[Tuple[int, int]] = (), min_block_size: int = 64):
+        self.pairs = 0
+        self.left_count: Counter = Counter()
+        self.right_count: Counter = Counter()
+        self.distance = 0
+        self.similarity = 0
+        self._gaps = _GapProfile(min_block_size)
+        for left, right in pairs:
+            self.add(left, right)
+
+    def __len__(self) -> int:
+        return self.pairs
+
+    def add(self, left: int, right: int):
+        if left < right:
+            self.distance += self._gaps.shift(left, right, 1)
+        elif right < left:
+            self.distance += self._gaps.shift(right, left, -1)
+
+        self.similarity += left * self.right_count[left]
+        self.left_count[left] += 1
+        self.similarity += right * self.left_count[right]
+        self.right_count[right] += 1
+        self.pairs += 1
+
+    def remove(self, left: int, right: int):
+        if not self.left_count[left]:
+            raise ValueError(f"left ID {left} is not present")
+        if not self.right_count[right]:
+            raise ValueError(f"right ID {right} is not present")
+        self.pairs -= 1
+
+        # the exact reverse of adding the pair
+        if left < right:
+            self.distance += self._gaps.shift(left, right, -1)
+        elif right < left:
+            self.distance += self._gaps.shift(right, left, 1)
+
+        self.right_count[right] -= 1
+        self.similarity -= right * self.left_count[right]
+        self.left_count[left] -= 1
+        self.similarity -= left * self.right_count[left]
+        for counts, value in ((self.left_count, left), (self.right_count, right)):
+            if not counts[value]:
+                del counts[value]
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else input_data_path
+    input_file = sys.stdin if path == "-" else open(path)
+    with input_file:
+        pairs = (line.split() for line in input_file if line.strip())
+        scorer = IncrementalScorer((int(a), int(b)) for a, b in pairs)
+
+    print("List distance:", scorer.distance)
+    print("Similarity score:", scorer.similarity)
@@ -1,34 +1,90 @@
 import pathlib
+import sys
+from array import array
 
 current_dir = pathlib.Path(__file__).parent.resolve()
 input_data_path = current_dir.joinpath("input.txt")
 
-with open(input_data_path, "r") as input_file:
-    data = input_file.readlines()
+sys.path.append(str(current_dir.parents[1]))
+from aoc.cache import load_cached  # noqa: E402
 
-data = list(map(lambda x: tuple(int(y) for y in x.strip().split("  ")), data))
+try:
+    import numpy as np
+except ImportError:  # the pure-Python paths below are used instead
+    np = None
 
-l1 = [x[0] for x in data]
-l2 = [x[1] for x in data]
 
-l1 = sorted(l1)
-l2 = sorted(l2)
+def parse(text):
+    if np is not None:
+        # whitespace-separated bulk parse, no per-value Python objects
+        values = np.fromstring(text, dtype=np.int64, sep=" ")
+        return {"left": values[0::2].copy(), "right": values[1::2].copy()}
+    values = array("q", map(int, text.split()))
+    return {"left": values[0::2], "right": values[1::2]}
 
-s = 0
 
-for n1, n2 in zip(l1, l2):
-    s += abs(n1 - n2)
+def _columns(data):
+    left = np.frombuffer(data["left"], dtype=np.int64)
+    right = np.frombuffer(data["right"], dtype=np.int64)
+    return left, right
 
-print("List distance:", s)
 
-freq = {}
-for n in l2:
-    if n not in freq:
-        freq[n] = 0
-    freq[n] += 1
+def distance_numpy(data):
+    left, right = _columns(data)
+    return int(np.abs(np.sort(left) - np.sort(right)).sum())
 
-s = 0
-for n in l1:
-    s += n * (0 if n not in freq else freq[n])
 
-print("Similarity score:", s)
+def similarity_numpy(data):
+    left, right = _columns(data)
+    if not len(left) or not len(right):
+        return 0
+
+    low, high = int(right.min()), int(right.max())
+    if high - low <= 4 * len(right) + 1024:
+        # dense IDs: a count per possible value, looked up directly
+        counts = np.bincount(right - low)
+        inside = (left >= low) & (left <= high)
+        hits = left[inside]
+        return int((hits * counts[hits - low]).sum())
+
+    values, counts = np.unique(right, return_counts=True)
+    # position of each left value among the distinct right values, if present
+    index = np.minimum(np.searchsorted(values, left), len(values) - 1)
+    found = values[index] == left
+    return int((left[found] * counts[index[found]]).sum())
+
+
+def part1(data):
+    if np is not None:
+        return distance_numpy(data)
+
+    l1 = sorted(data["left"])
+    l2 = sorted(data["right"])
+
+    s = 0
+    for n1, n2 in zip(l1, l2):
+        s += abs(n1 - n2)
+    return s
+
+
+def part2(data):
+    if np is not None:
+        return similarity_numpy(data)
+
+    freq = {}
+    for n in data["right"]:
+        if n not in freq:
+            freq[n] = 0
+        freq[n] += 1
+
+    s = 0
+    for n in data["left"]:
+        s += n * (0 if n not in freq else freq[n])
+    return s
+
+
+if __name__ == "__main__":
+    data = load_cached(input_data_path, parse)
+
+    print("List distance:", part1(data))
+    print("Similarity score:", part2(data))
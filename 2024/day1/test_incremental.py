@@ -0,0 +1,45 @@
+import random
+from collections import Counter
+
+from incremental import IncrementalScorer
+
+
+def brute_force(pairs):
+    left, right = Counter(l for l, _ in pairs), Counter(r for _, r in pairs)
+    distance = sum(
+        abs(l - r)
+        for l, r in zip(sorted(l for l, _ in pairs), sorted(r for _, r in pairs))
+    )
+    return distance, sum(v * left[v] * right[v] for v in left)
+
+
+def pieces(scorer):
+    return sum(len(block.starts) for block in scorer._gaps.blocks)
+
+
+def test_adds_and_removes_match_brute_force():
+    rng = random.Random(0)
+    for min_block_size in (1, 2, 4, 64):
+        for _ in range(50):
+            scorer = IncrementalScorer(min_block_size=min_block_size)
+            pairs = []
+            for _ in range(rng.randrange(1, 200)):
+                if pairs and rng.random() < 0.45:
+                    scorer.remove(*pairs.pop(rng.randrange(len(pairs))))
+                else:
+                    pairs.append((rng.randrange(30), rng.randrange(30)))
+                    scorer.add(*pairs[-1])
+                assert (scorer.distance, scorer.similarity) == brute_force(pairs)
+            # at most one piece per distinct ID
+            assert pieces(scorer) <= len({v for pair in pairs for v in pair})
+
+
+def test_removing_every_pair_leaves_no_pieces():
+    rng = random.Random(1)
+    scorer = IncrementalScorer(min_block_size=4)
+    for _ in range(2000):
+        pair = (rng.randrange(10**6), rng.randrange(10**6))
+        scorer.add(*pair)
+        scorer.remove(*pair)
+    assert len(scorer) == 0
+    assert pieces(scorer) == 0 and scorer._gaps.blocks == []
@@ -1,44 +1,154 @@
 import pathlib
+import sys
+from array import array
 
 current_dir = pathlib.Path(__file__).parent.resolve()
 input_data_path = current_dir.joinpath("input.txt")
 
-with open(input_data_path, "r") as input_file:
-    data = input_file.readlines()
+sys.path.append(str(current_dir.parents[1]))
+from aoc.cache import load_cached  # noqa: E402
 
+try:
+    import numpy as np
+except ImportError:  # the per-report loops below are used instead
+    np = None
 
-data = list(map(lambda x: list(int(y) for y in x.strip().split(" ")), data))
 
+def parse(text):
+    # all reports back to back in `levels`; report i is levels[offsets[i]:offsets[i + 1]]
+    levels = array("q")
+    offsets = array("q", [0])
+    for line in text.splitlines():
+        levels.extend(int(y) for y in line.strip().split(" "))
+        offsets.append(len(levels))
+    return {"levels": levels, "offsets": offsets}
+
+
+def reports(data):
+    levels, offsets = data["levels"], data["offsets"]
+    for i in range(len(offsets) - 1):
+        yield list(levels[offsets[i] : offsets[i + 1]])
+
+
+def first_violation(levels, sign, skip=-1):
+    """
+    Return the index of the first level that does not step 1-3 in `sign`'s
+    direction (1 increasing, -1 decreasing) from the level kept before it, or
+    -1 if there is none. The level at index `skip` is left out.
+    """
+    previous = None
+    for i, level in enumerate(levels):
+        if i == skip:
+            continue
+        if previous is not None and not 1 <= (level - previous) * sign <= 3:
+            return i
+        previous = level
+    return -1
 
-def is_safe_1(levels):
-    if levels != sorted(levels) and levels != sorted(levels, reverse=True):
-        return 0
-    shifted_levels = levels[1:]
-    for i in range(len(shifted_levels)):
-        if abs(levels[i] - shifted_levels[i]) not in {1, 2, 3}:
-            return 0
-    return 1
 
+def single_fault_index(levels):
+    """
+    Find a level whose removal makes the report safe in O(n).
 
-s = 0
-for levels in data:
-    s += is_safe_1(levels)
+    Returns -1 if the report is already safe, the index to remove if one
+    removal is enough, and None otherwise. In either direction the first bad
+    step is between levels i - 1 and i, and any fix must remove one of those
+    two, so at most two deletions per direction are tried.
+    """
+    candidates = []
+    for sign in (1, -1):
+        i = first_violation(levels, sign)
+        if i == -1:
+            return -1
+        candidates.append((sign, i - 1))
+        candidates.append((sign, i))
+    for sign, skip in candidates:
+        if first_violation(levels, sign, skip) == -1:
+            return skip
+    return None
 
-print("Safe reports:", s)
+
+def is_safe_1(levels):
+    return int(first_violation(levels, 1) == -1 or first_violation(levels, -1) == -1)
 
 
 def is_safe_2(levels):
-    if is_safe_1(levels):
-        return 1
-    for i in range(len(levels)):
-        single_fault_levels = levels[:i] + levels[i + 1 :]
-        if is_safe_1(single_fault_levels):
-            return 1
-    return 0
+    return int(single_fault_index(levels) is not None)
+
+
+def _bad_span(bad, report_of, count):
+    """
+    Index of the first and last set flag of each report, -1 where there is none.
+    """
+    first = np.full(count, -1, dtype=np.int64)
+    last = np.full(count, -1, dtype=np.int64)
+    positions = np.flatnonzero(bad)
+    owners = report_of[positions]
+    # positions are ascending, so each report's flags are one contiguous run
+    new_owner = np.ones(len(owners), dtype=bool)
+    new_owner[1:] = owners[1:] != owners[:-1]
+    first[owners[new_owner]] = positions[new_owner]
+    last_of_owner = np.roll(new_owner, -1)
+    last[owners[last_of_owner]] = positions[last_of_owner]
+    return first, last
+
+
+def safe_masks_numpy(data):
+    """
+    Part 1 and part 2 verdicts for every report at once, straight from the
+    CSR columns.
+
+    Step g is levels[g + 1] - levels[g] and only counts inside a report. For
+    each direction the first and last bad step bound the fix: removing level
+    k leaves the report safe only if every bad step touches k (first >= k - 1
+    and last <= k) and the step that now bridges over k is good. k can only
+    be either level of the first bad step, so two candidates per direction
+    are checked as whole-array operations.
+    """
+    levels = np.frombuffer(data["levels"], dtype=np.int64)
+    offsets = np.frombuffer(data["offsets"], dtype=np.int64)
+    count = len(offsets) - 1
+    starts, ends = offsets[:-1], offsets[1:]
+    report_of = np.repeat(np.arange(count), ends - starts)
+
+    steps = np.diff(levels)
+    inside = report_of[:-1] == report_of[1:]
+
+    safe = np.zeros(count, dtype=bool)
+    fixable = np.zeros(count, dtype=bool)
+    for sign in (1, -1):
+        signed = steps * sign
+        bad = inside & ((signed < 1) | (signed > 3))
+        first, last = _bad_span(bad, report_of[:-1], count)
+        safe |= first == -1
+
+        faulty = np.flatnonzero(first != -1)
+        for k in (first[faulty], first[faulty] + 1):
+            covered = (first[faulty] >= k - 1) & (last[faulty] <= k)
+            inner = (k > starts[faulty]) & (k < ends[faulty] - 1)
+            # the bridge is only read where k has neighbours on both sides
+            below = np.where(inner, k - 1, 0)
+            above = np.where(inner, k + 1, 0)
+            bridge = (levels[above] - levels[below]) * sign
+            bridged = ~inner | ((bridge >= 1) & (bridge <= 3))
+            fixable[faulty[covered & bridged]] = True
+    return safe, safe | fixable
+
+
+def part1(data):
+    if np is not None:
+        return int(safe_masks_numpy(data)[0].sum())
+    return sum(is_safe_1(levels) for levels in reports(data))
+
+
+def part2(data):
+    if np is not None:
+        return int(safe_masks_numpy(data)[1].sum())
+    return sum(is_safe_2(levels) for levels in reports(data))
 
 
-s = 0
-for levels in data:
-    s += is_safe_2(levels)
+if __name__ == "__main__":
+    data = load_cached(input_data_path, parse)
 
-print("Single-fault safe reports:", s)
+    print("Safe reports:", part1(data))
+    print("Single-fault safe reports:", part2(data))
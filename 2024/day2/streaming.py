@@ -0,0 +1,108 @@
+"""
+Day2 as a lazy pipeline for inputs that do not fit in memory or arrive on a
+pipe.
+
+Lines are read one at a time, parsed and classified with
+`single_fault_index`, so memory stays constant in the number of reports. With
+`--verdicts` each report's verdict is written as a tab-separated line as soon
+as it is known:
+
+    <report number>  safe | fault | unsafe  <index removed, or ->
+
+The totals go to stdout, or to stderr when the verdicts are written to stdout.
+
+    python streaming.py [INPUT | -] [--verdicts [OUTPUT | -]]
+"""
+
+import argparse
+import sys
+from typing import Iterable, Iterator, List, NamedTuple, Optional, TextIO
+
+from main import input_data_path, single_fault_index
+
+
+class Verdict(NamedTuple):
+    report: int
+    levels: List[int]
+    # -1 if already safe, the index whose removal makes it safe, or None
+    fault_index: Optional[int]
+
+    @property
+    def label(self) -> str:
+        if self.fault_index is None:
+            return "unsafe"
+        return "safe" if self.fault_index == -1 else "fault"
+
+
+class Counts(NamedTuple):
+    reports: int = 0
+    safe: int = 0
+    single_fault_safe: int = 0
+
+
+def read_reports(lines: Iterable[str]) -> Iterator[List[int]]:
+    for line in lines:
+        if line.strip():
+            yield [int(level) for level in line.split()]
+
+
+def classify(reports: Iterable[List[int]]) -> Iterator[Verdict]:
+    for i, levels in enumerate(reports, 1):
+        yield Verdict(i, levels, single_fault_index(levels))
+
+
+def write_verdicts(verdicts: Iterable[Verdict], out: TextIO) -> Iterator[Verdict]:
+    """
+    Pass the verdicts through, writing each one to `out` on the way.
+    """
+    for verdict in verdicts:
+        removed = verdict.fault_index if verdict.label == "fault" else "-"
+        out.write(f"{verdict.report}\t{verdict.label}\t{removed}\n")
+        yield verdict
+
+
+def running_counts(verdicts: Iterable[Verdict]) -> Iterator[Counts]:
+    counts = Counts()
+    for verdict in verdicts:
+        counts = Counts(
+            counts.reports + 1,
+            counts.safe + (verdict.fault_index == -1),
+            counts.single_fault_safe + (verdict.fault_index is not None),
+        )
+        yield counts
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("input", nargs="?", default=str(input_data_path))
+    parser.add_argument(
+        "--verdicts",
+        nargs="?",
+        const="-",
+        metavar="OUTPUT",
+        help="write a verdict per report, to stdout if no file is given",
+    )
+    args = parser.parse_args(argv)
+
+    input_file = sys.stdin if args.input == "-" else open(args.input)
+    verdict_file = None
+    if args.verdicts is not None:
+        verdict_file = sys.stdout if args.verdicts == "-" else open(args.verdicts, "w")
+    summary = sys.stderr if verdict_file is sys.stdout else sys.stdout
+
+    counts = Counts()
+    with input_file:
+        verdicts = classify(read_reports(input_file))
+        if verdict_file is not None:
+            verdicts = write_verdicts(verdicts, verdict_file)
+        for counts in running_counts(verdicts):
+            pass
+    if verdict_file is not None and verdict_file is not sys.stdout:
+        verdict_file.close()
+
+    print("Safe reports:", counts.safe, file=summary)
+    print("Single-fault safe reports:", counts.single_fault_safe, file=summary)
+
+
+if __name__ == "__main__":
+    main()
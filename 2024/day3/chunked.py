@@ -0,0 +1,131 @@
+"""
+Day3 over memory-mapped chunks scanned in parallel.
+
+The input is split into chunks of about `chunk_bytes`. A boundary that would
+cut a token in half is moved back to the start of that token. Tokens never
+contain an "m" or "d" after their first byte, so wherever a token matches it
+is also a token of the whole-buffer scan.
+
+A chunk cannot know whether mul starts out enabled, so each worker returns a
+`Summary` that covers both cases. Everything before the chunk's first do() or
+don't() counts only when it starts enabled. From that token on, the state no
+longer depends on the start. The summaries are then folded left to right
+starting from the enabled state.
+
+    python chunked.py [INPUT] [--workers N] [--chunk-mb 64]
+"""
+
+import argparse
+import mmap
+import multiprocessing
+import os
+import pathlib
+import re
+from typing import List, NamedTuple, Optional, Tuple
+
+from scanner import TOKEN, scan
+
+current_dir = pathlib.Path(__file__).parent.resolve()
+input_data_path = current_dir.joinpath("input.txt")
+
+TOGGLE = re.compile(rb"do\(\)|don't\(\)")
+
+# the longest token, mul(999,999)
+MAX_TOKEN = 12
+
+
+class Summary(NamedTuple):
+    total: int
+    # enabled products if mul is enabled, or disabled, where the chunk starts
+    if_enabled: int
+    if_disabled: int
+    # the state after the chunk, None if it has no do() or don't()
+    final_state: Optional[bool]
+
+
+def chunk_bounds(buffer, chunk_bytes: int) -> List[Tuple[int, int]]:
+    bounds = []
+    start = 0
+    while start < len(buffer):
+        end = min(start + chunk_bytes, len(buffer))
+        if end < len(buffer):
+            # a token crossing `end` starts at most MAX_TOKEN - 1 bytes before it
+            for i in range(max(start, end - MAX_TOKEN + 1), end):
+                match = TOKEN.match(buffer, i)
+                if match is not None and match.end() > end:
+                    end = i
+                    break
+        if end == start:
+            # a chunk smaller than one token, keep the token whole
+            end = TOKEN.match(buffer, start).end()
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+
+def summarize(buffer, start: int, end: int) -> Summary:
+    toggle = TOGGLE.search(buffer, start, end)
+    if toggle is None:
+        rest = scan(buffer, True, start, end)
+        return Summary(rest.total, rest.enabled_total, 0, None)
+
+    head = scan(buffer, True, start, toggle.start())
+    # the toggle sets the state itself, so the start state is irrelevant here
+    rest = scan(buffer, True, toggle.start(), end)
+    return Summary(
+        head.total + rest.total,
+        head.total + rest.enabled_total,
+        rest.enabled_total,
+        rest.enabled,
+    )
+
+
+def _summarize_chunk(task: Tuple[str, int, int]) -> Summary:
+    path, start, end = task
+    with open(path, "rb") as input_file:
+        with mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return summarize(buffer, start, end)
+
+
+def combine(summaries: List[Summary]) -> Tuple[int, int]:
+    """
+    Fold chunk summaries in input order into (sum, enabled sum).
+    """
+    total = enabled_total = 0
+    enabled = True
+    for summary in summaries:
+        total += summary.total
+        enabled_total += summary.if_enabled if enabled else summary.if_disabled
+        if summary.final_state is not None:
+            enabled = summary.final_state
+    return total, enabled_total
+
+
+def solve(
+    input_path: pathlib.Path, workers: int = 1, chunk_bytes: int = 64 << 20
+) -> Tuple[int, int]:
+    if os.path.getsize(input_path) == 0:
+        return 0, 0
+    with open(input_path, "rb") as input_file:
+        with mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            bounds = chunk_bounds(buffer, chunk_bytes)
+            if workers <= 1 or len(bounds) < 2:
+                return combine([summarize(buffer, *bound) for bound in bounds])
+
+    tasks = [(str(input_path), start, end) for start, end in bounds]
+    with multiprocessing.Pool(workers) as pool:
+        return combine(pool.map(_summarize_chunk, tasks))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("input", nargs="?", type=pathlib.Path, default=input_data_path)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-mb", type=float, default=64, help="bytes per task")
+    args = parser.parse_args()
+
+    total, enabled_total = solve(
+        args.input, args.workers, max(1, int(args.chunk_mb * (1 << 20)))
+    )
+    print("Sum:", total)
+    print("Enabled sum:", enabled_total)
@@ -1,29 +1,27 @@
 import pathlib
-import re
+
+from scanner import scan
 
 current_dir = pathlib.Path(__file__).parent.resolve()
 input_data_path = current_dir.joinpath("input.txt")
 
-with open(input_data_path, "r") as input_file:
-    data = input_file.read()
 
+def parse(text):
+    # the tokens are ASCII, so latin-1 maps every character to one byte
+    return text.encode("latin-1", "replace")
+
+
+def part1(data):
+    return scan(data).total
 
-def compute(data_str: str):
-    muls = re.findall("mul\(\d{1,3},\d{1,3}\)", data_str)
-    muls = list(map(lambda x: tuple(int(y) for y in x[4:-1].split(",")), muls))
-    return sum(x[0] * x[1] for x in muls)
 
+def part2(data):
+    return scan(data).enabled_total
 
-print("Sum:", compute(data))
 
-s = 0
-while data:
-    if data.find("don't()") == -1:
-        s += compute(data)
-        break
-    to_proc = data[: data.find("don't()")]
-    s += compute(to_proc)
-    data = data[data.find("don't()") :]
-    data = data[data.find("do()") :]
+if __name__ == "__main__":
+    with open(input_data_path, "rb") as input_file:
+        data = input_file.read()
 
-print("Enabled sum:", s)
+    print("Sum:", part1(data))
+    print("Enabled sum:", part2(data))
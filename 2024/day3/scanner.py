@@ -0,0 +1,52 @@
+"""
+One-pass tokenizer for day3's corrupted memory.
+
+A single precompiled bytes pattern matches `mul(a,b)`, `do()` and `don't()`
+as alternatives, so the buffer is walked once, left to right, without
+decoding or slicing. The total of all products and the total of the enabled
+ones are accumulated in that same pass. Any bytes-like buffer works,
+including an `mmap`.
+"""
+
+import re
+from typing import NamedTuple
+
+TOKEN = re.compile(rb"mul\((\d{1,3}),(\d{1,3})\)|(do\(\))|(don't\(\))")
+
+# `lastindex` of a match tells the alternatives apart
+MUL, DO, DONT = 2, 3, 4
+
+
+class Scan(NamedTuple):
+    total: int
+    enabled_total: int
+    # whether mul instructions are enabled after the last token
+    enabled: bool
+
+
+def scan(buffer, enabled: bool = True, start: int = 0, end: int = -1) -> Scan:
+    """
+    Sum the products in buffer[start:end], all of them and the enabled ones.
+
+    Args:
+        buffer: The corrupted memory as bytes, bytearray or mmap.
+        enabled (bool, optional): Whether mul is enabled at `start`. Defaults to True.
+        start (int, optional): Where to start scanning. Defaults to 0.
+        end (int, optional): Where to stop scanning, -1 for the end. Defaults to -1.
+
+    Returns:
+        Scan: Both sums and the state after the scanned range.
+    """
+    if end == -1:
+        end = len(buffer)
+    total = enabled_total = 0
+    for match in TOKEN.finditer(buffer, start, end):
+        kind = match.lastindex
+        if kind == MUL:
+            product = int(match[1]) * int(match[2])
+            total += product
+            if enabled:
+                enabled_total += product
+        else:
+            enabled = kind == DO
+    return Scan(total, enabled_total, enabled)
@@ -0,0 +1,184 @@
+"""
+Search a day4 grid for many words at once with an Aho-Corasick automaton.
+
+The automaton holds every word and every word reversed. Each row, column,
+diagonal and anti-diagonal is streamed through it once, so one pass finds all
+words in all 8 directions. The work is O(cells + matches), however many words
+there are. Like `main.count_word`, a palindrome counts once per direction it
+reads in.
+
+    python aho_corasick.py [INPUT] [--words XMAS MAS ...] [--words-file FILE]
+                           [--positions]
+"""
+
+import argparse
+import pathlib
+import sys
+from collections import Counter, deque
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+current_dir = pathlib.Path(__file__).parent.resolve()
+input_data_path = current_dir.joinpath("input.txt")
+
+sys.path.append(str(current_dir.parents[1]))
+from aoc.grid import Grid  # noqa: E402
+
+
+class Match(NamedTuple):
+    word: str
+    # first letter of the word and the direction it reads in
+    r: int
+    c: int
+    dr: int
+    dc: int
+
+
+class AhoCorasick:
+    """
+    A trie of byte patterns with failure links.
+
+    `outputs[s]` lists the patterns that end exactly at state s. `report[s]` is
+    the nearest state on the failure chain of s (s itself included) that has
+    outputs, or -1, so matches are collected without merging output lists.
+    """
+
+    def __init__(self, patterns: Iterable[bytes]):
+        self.patterns: List[bytes] = []
+        self.goto: List[Dict[int, int]] = [{}]
+        self.outputs: List[List[int]] = [[]]
+        for pattern in patterns:
+            self._insert(pattern)
+        self.fail = [0] * len(self.goto)
+        self.report = [-1] * len(self.goto)
+        self._link()
+
+    def _insert(self, pattern: bytes):
+        if not pattern:
+            raise ValueError("patterns must not be empty")
+        state = 0
+        for byte in pattern:
+            next_state = self.goto[state].get(byte)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][byte] = next_state
+                self.goto.append({})
+                self.outputs.append([])
+            state = next_state
+        self.outputs[state].append(len(self.patterns))
+        self.patterns.append(pattern)
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        for state in queue:
+            self.report[state] = state if self.outputs[state] else -1
+        while queue:
+            state = queue.popleft()
+            for byte, child in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and byte not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(byte, 0)
+                if self.outputs[child]:
+                    self.report[child] = child
+                else:
+                    self.report[child] = self.report[self.fail[child]]
+                queue.append(child)
+
+    def iter_matches(self, line: Iterable[int]) -> Iterator[Tuple[int, int]]:
+        """
+        Yield (index of the last byte, pattern id) for every match in `line`.
+        """
+        goto, fail, report, outputs = self.goto, self.fail, self.report, self.outputs
+        state = 0
+        for i, byte in enumerate(line):
+            while state and byte not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(byte, 0)
+            hit = report[state]
+            while hit != -1:
+                for pattern in outputs[hit]:
+                    yield i, pattern
+                hit = report[fail[hit]]
+
+
+def grid_lines(grid: Grid) -> Iterator[Tuple[int, int, int, int, memoryview]]:
+    """
+    Yield (r, c, dr, dc, view) for every row, column and diagonal of the grid,
+    starting at (r, c) and stepping by (dr, dc).
+    """
+    for r in range(grid.height):
+        yield r, 0, 0, 1, grid.row(r)
+    for c in range(grid.width):
+        yield 0, c, 1, 0, grid.col(c)
+    for r, c, view in grid.diagonals():
+        yield r, c, 1, 1, view
+    for r, c, view in grid.anti_diagonals():
+        yield r, c, 1, -1, view
+
+
+def search(
+    grid: Grid, words: Iterable[str], positions: bool = False
+) -> Tuple[Counter, Dict[str, List[Match]]]:
+    """
+    Count every word in all 8 directions.
+
+    Args:
+        grid (Grid): The letter grid.
+        words (Iterable[str]): The words to look for.
+        positions (bool, optional): Also list where each match is. Defaults to False.
+
+    Returns:
+        Tuple containing:
+        - Counter: The number of matches per word, including the words not found
+        - Dict[str, List[Match]]: The matches per word, empty unless `positions`
+    """
+    words = list(dict.fromkeys(words))
+    # pattern 2 * i is word i as written and 2 * i + 1 is its reverse
+    automaton = AhoCorasick(
+        pattern for word in words for pattern in (word.encode(), word[::-1].encode())
+    )
+    lengths = [len(pattern) for pattern in automaton.patterns]
+
+    counts = Counter(dict.fromkeys(words, 0))
+    found: Dict[str, List[Match]] = {}
+    for r, c, dr, dc, line in grid_lines(grid):
+        for end, pattern in automaton.iter_matches(line):
+            word = words[pattern // 2]
+            counts[word] += 1
+            if not positions:
+                continue
+            start = end - lengths[pattern] + 1
+            if pattern % 2:
+                # read backwards along the line: the word starts at the far end
+                first, step = end, -1
+            else:
+                first, step = start, 1
+            found.setdefault(word, []).append(
+                Match(word, r + first * dr, c + first * dc, step * dr, step * dc)
+            )
+    return counts, found
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("input", nargs="?", type=pathlib.Path, default=input_data_path)
+    parser.add_argument("--words", nargs="+", default=[])
+    parser.add_argument("--words-file", type=pathlib.Path, help="one word per line")
+    parser.add_argument("--positions", action="store_true")
+    args = parser.parse_args(argv)
+
+    words = list(args.words)
+    if args.words_file is not None:
+        words += [w.strip() for w in args.words_file.read_text().splitlines()]
+    words = [word for word in words if word] or ["XMAS"]
+
+    grid = Grid.from_text(args.input.read_text())
+    counts, found = search(grid, words, positions=args.positions)
+    for word in dict.fromkeys(words):
+        print(f"{word}: {counts[word]}")
+        for match in found.get(word, []):
+            print(f"  ({match.r}, {match.c}) towards ({match.dr}, {match.dc})")
+
+
+if __name__ == "__main__":
+    main()
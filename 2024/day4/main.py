@@ -1,19 +1,27 @@
 import pathlib
-from typing import Generator, List, Tuple
+import sys
+from typing import Tuple
 
 current_dir = pathlib.Path(__file__).parent.resolve()
 input_data_path = current_dir.joinpath("input.txt")
 
-with open(input_data_path, "r") as input_file:
-    data = input_file.readlines()
+sys.path.append(str(current_dir.parents[1]))
+from aoc.cache import load_cached  # noqa: E402
+from aoc.grid import Grid  # noqa: E402
 
-data = [d.strip() for d in data]
+try:
+    import numpy as np
+except ImportError:  # the per-line Grid scans below are used instead
+    np = None
 
+# (row offset, column offset) -> required letter, relative to an anchor cell
+Stencil = Tuple[Tuple[Tuple[int, int], str], ...]
 
-def transpose(data):
-    return [
-        "".join([data[i][j] for i in range(len(data))]) for j in range(len(data[0]))
-    ]
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1), (0, -1), (-1, 0), (-1, -1), (-1, 1))
+
+
+def parse(text):
+    return {"grid": Grid.from_lines([d.strip() for d in text.splitlines()]).view()}
 
 
 def countXMAS(r: str, str_len=len("XMAS")) -> int:
@@ -25,51 +33,99 @@ def countXMAS(r: str, str_len=len("XMAS")) -> int:
     return n
 
 
-def generate_kernels(
-    data: List[List[chr]], size: Tuple[int, int] = (4, 4)
-) -> Generator[List[List[str]], None, None]:
-    # Assuming `data` is a m by n matrix
-    k_top_left_i, k_top_left_j = 0, 0
-    while k_top_left_i <= len(data) - size[0]:
-        M = [
-            d[k_top_left_j : k_top_left_j + size[1]]
-            for d in data[k_top_left_i : k_top_left_i + size[0]]
-        ]
-        M = ["".join(row) for row in M]
-        yield M
-        k_top_left_j += 1
-        if k_top_left_j > len(data[0]) - size[1]:
-            k_top_left_j = 0
-            k_top_left_i += 1
-
-
-def check_MAS(kernel):
-    k_idxs = [0, 1, 2]
-    s1 = "".join([kernel[i][i] for i in k_idxs])
-    s2 = "".join([kernel[i][2 - i] for i in k_idxs])
+def check_MAS(grid: Grid, i: int, j: int) -> int:
+    # (i, j) is the centre of a 3x3 window
+    s1 = grid[i - 1, j - 1] + grid[i, j] + grid[i + 1, j + 1]
+    s2 = grid[i - 1, j + 1] + grid[i, j] + grid[i + 1, j - 1]
     return int(all([s in ["MAS", "SAM"] for s in [s1, s2]]))
 
 
-N = 0
-
-# all horizontal
-for row in data:
-    N += countXMAS(row)
-
-# all vertical
-for col in transpose(data):
-    N += countXMAS(col)
-
-k_idxs = [0, 1, 2, 3]
-for kernel in generate_kernels(data):
-    s1 = "".join([kernel[i][i] for i in k_idxs])
-    s2 = "".join([kernel[i][3 - i] for i in k_idxs])
-    N += sum(int(s in ["XMAS", "SAMX"]) for s in [s1, s2])
-
-print("XMAS appearances:", N)
-
-M = 0
-for kernel in generate_kernels(data, size=(3, 3)):
-    M += check_MAS(kernel)
-
-print("X-MAS appearances:", M)
+def word_stencil(word: str, dr: int, dc: int, r: int = 0, c: int = 0) -> Stencil:
+    """
+    `word` written from (r, c) in direction (dr, dc).
+    """
+    return tuple(((r + k * dr, c + k * dc), letter) for k, letter in enumerate(word))
+
+
+def x_stencils(word: str = "MAS") -> Tuple[Stencil, ...]:
+    """
+    The X-MAS crosses: `word` on both diagonals, either way round, anchored on
+    their shared middle cell.
+    """
+    half = len(word) // 2
+    return tuple(
+        word_stencil(down, 1, 1, -half, -half) + word_stencil(up, -1, 1, half, -half)
+        for down in (word, word[::-1])
+        for up in (word, word[::-1])
+    )
+
+
+def count_stencil(cells, stencil: Stencil) -> int:
+    """
+    Count the anchors where every cell of `stencil` holds its letter.
+
+    For each stencil cell, the letters of all anchors at once are compared as
+    one shifted slice of `cells`, and the matches are ANDed together. No
+    window is ever materialized.
+    """
+    height, width = cells.shape
+    rows = [dr for (dr, _), _ in stencil]
+    cols = [dc for (_, dc), _ in stencil]
+    r0, c0 = -min(0, *rows), -min(0, *cols)
+    h = height - r0 - max(0, *rows)
+    w = width - c0 - max(0, *cols)
+    if h <= 0 or w <= 0:
+        return 0
+
+    match = np.ones((h, w), dtype=bool)
+    for (dr, dc), letter in stencil:
+        window = cells[r0 + dr : r0 + dr + h, c0 + dc : c0 + dc + w]
+        match &= window == ord(letter)
+    return int(match.sum())
+
+
+def count_word(cells, word: str) -> int:
+    return sum(
+        count_stencil(cells, word_stencil(word, dr, dc)) for dr, dc in DIRECTIONS
+    )
+
+
+def part1(data):
+    grid = Grid.from_view(data["grid"])
+    if np is not None:
+        return count_word(grid.to_numpy(), "XMAS")
+    N = 0
+
+    # all horizontal
+    for i in range(grid.height):
+        N += countXMAS(grid.row(i).tobytes().decode())
+
+    # all vertical
+    for j in range(grid.width):
+        N += countXMAS(grid.col(j).tobytes().decode())
+
+    # all diagonals, both ways
+    for _, _, diagonal in grid.diagonals():
+        N += countXMAS(diagonal.tobytes().decode())
+    for _, _, diagonal in grid.anti_diagonals():
+        N += countXMAS(diagonal.tobytes().decode())
+    return N
+
+
+def part2(data):
+    grid = Grid.from_view(data["grid"])
+    if np is not None:
+        cells = grid.to_numpy()
+        return sum(count_stencil(cells, stencil) for stencil in x_stencils())
+    M = 0
+    for i, j in grid.iter_find("A"):
+        if 1 <= i < grid.height - 1 and 1 <= j < grid.width - 1:
+            M += check_MAS(grid, i, j)
+    return M
+
+
+if __name__ == "__main__":
+    data = load_cached(input_data_path, parse)
+
+    print("XMAS appearances:", part1(data))
+    print("X-MAS appearances:", part2(data))
@@ -0,0 +1,118 @@
+"""
+Day4 over a stream of rows, for grids too tall to hold in memory.
+
+Only the last k rows are kept, where k is the tallest pattern. Each row is
+stored as one bitmask per letter: `row.translate` turns the row into 0/1 bytes
+and `int.from_bytes` packs those into an int with byte c set for column c. A
+stencil (see `main.word_stencil`) then matches wherever the AND of its cells'
+masks, each shifted right by 8 bits per column of offset, has a byte set.
+Every match is counted when its lowest row arrives, so nothing is counted
+twice and memory is O(k * width).
+
+    python row_band.py [INPUT | -] [--word XMAS] [--cross MAS]
+"""
+
+import argparse
+import sys
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from main import DIRECTIONS, Stencil, input_data_path, word_stencil, x_stencils
+
+# (row offset from the top, column offset from the left, letter)
+Cell = Tuple[int, int, int]
+
+
+def _normalize(stencil: Stencil) -> Tuple[Cell, ...]:
+    top = min(dr for (dr, _), _ in stencil)
+    left = min(dc for (_, dc), _ in stencil)
+    return tuple((dr - top, dc - left, ord(letter)) for (dr, dc), letter in stencil)
+
+
+class RowBand:
+    """
+    Counts matches of named groups of stencils in rows pushed one at a time.
+    """
+
+    def __init__(self, patterns: Dict[str, Sequence[Stencil]]):
+        self.patterns = {
+            name: [_normalize(stencil) for stencil in stencils]
+            for name, stencils in patterns.items()
+        }
+        cells = [cell for group in self.patterns.values() for s in group for cell in s]
+        self.height = 1 + max((dr for dr, _, _ in cells), default=0)
+        # letter -> translate table that keeps a 1 byte where the letter is
+        self._tables = {
+            letter: bytes(int(i == letter) for i in range(256))
+            for letter in {letter for _, _, letter in cells}
+        }
+        self.rows: Deque[Dict[int, int]] = deque(maxlen=self.height)
+        self.width: Optional[int] = None
+        self.counts = dict.fromkeys(self.patterns, 0)
+
+    def _masks(self, row: bytes) -> Dict[int, int]:
+        return {
+            letter: int.from_bytes(row.translate(table), "little")
+            for letter, table in self._tables.items()
+        }
+
+    def push(self, row: bytes) -> Dict[str, int]:
+        """
+        Add the next row and return the matches whose lowest cell is in it.
+        """
+        if self.width is None:
+            self.width = len(row)
+        elif len(row) != self.width:
+            raise ValueError("grid rows must all have the same length")
+        self.rows.append(self._masks(row))
+
+        found = dict.fromkeys(self.patterns, 0)
+        for name, stencils in self.patterns.items():
+            for stencil in stencils:
+                top = len(self.rows) - 1 - max(dr for dr, _, _ in stencil)
+                if top < 0:
+                    continue
+                match = -1
+                for dr, dc, letter in stencil:
+                    match &= self.rows[top + dr][letter] >> (8 * dc)
+                    if not match:
+                        break
+                found[name] += match.bit_count()
+        for name, count in found.items():
+            self.counts[name] += count
+        return found
+
+
+def count_rows(rows: Iterable[bytes], word: str = "XMAS", cross: str = "MAS"):
+    """
+    Count `word` in all 8 directions and the `cross` X shapes over `rows`.
+    """
+    band = RowBand(
+        {
+            "word": [word_stencil(word, dr, dc) for dr, dc in DIRECTIONS],
+            "cross": x_stencils(cross),
+        }
+    )
+    for row in rows:
+        band.push(row)
+    return band.counts["word"], band.counts["cross"]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("input", nargs="?", default=str(input_data_path))
+    parser.add_argument("--word", default="XMAS")
+    parser.add_argument("--cross", default="MAS", help="word crossed on diagonals")
+    args = parser.parse_args(argv)
+
+    input_file = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    with input_file:
+        rows = (line.strip() for line in input_file if line.strip())
+        words, crosses = count_rows(rows, args.word, args.cross)
+
+    print(f"{args.word} appearances:", words)
+    print(f"X-{args.cross} appearances:", crosses)
+
+
+if __name__ == "__main__":
+    main()
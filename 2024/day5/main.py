@@ -1,83 +1,195 @@
+import heapq
 import json
 import pathlib
-from typing import List, Tuple
+import sys
+from array import array
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Sequence, Tuple
 
 current_dir = pathlib.Path(__file__).parent.resolve()
 input_data_path = current_dir.joinpath("input.txt")
 
-with open(input_data_path, "r") as input_file:
-    data = input_file.read()
+sys.path.append(str(current_dir.parents[1]))
+from aoc.cache import load_cached  # noqa: E402
 
-ordering_rules, pages = data.split("\n\n")
-ordering_rules = ordering_rules.strip().split("\n")
-pages = pages.strip().split("\n")
 
-
-def get_anti_relation(relation: List[Tuple[str, str]]):
-    return [(b, a) for a, b in relation]
-
-
-def get_rules_relation(ordering_rules: List[str] = ordering_rules):
+def get_rules_relation(ordering_rules: List[str]):
     ordering = []
     for rule in ordering_rules:
         a, b = rule.split("|")
-        ordering.append((a, b))
+        ordering.append((int(a), int(b)))
     return ordering
 
 
-def get_page_relation(page: List[str]):
-    relation = []
-    for i in range(len(page)):
-        for j in range(i + 1, len(page)):
-            relation.append((page[i], page[j]))
-    return relation
-
-
-def page_violates_rules(
-    anti_rules_relation: List[Tuple[str, str]], page_relation: List[Tuple[str, str]]
-):
-    return set(anti_rules_relation).intersection(page_relation)
-
-
-def swap_elements(l, elemA, elemB):
-    i, j = 0, 0
-    for idx, value in enumerate(l):
-        if value == elemA:
-            i = idx
-        if value == elemB:
-            j = idx
-    l[i], l[j] = l[j], l[i]
-    return l
-
-
-def correct_violations(page, anti_rules_relation, page_relation):
-    violation = page_violates_rules(anti_rules_relation, page_relation)
-    if violation:
-        violation = violation.pop()
-    while violation:
-        page = swap_elements(page, *violation)
-        page_relation = get_page_relation(page)
-        violation = page_violates_rules(anti_rules_relation, page_relation)
-        if violation:
-            violation = violation.pop()
-    return page
-
-
-rules_relation = get_rules_relation(ordering_rules)
-anti_rules_relation = get_anti_relation(rules_relation)
-
-s1 = 0
-s2 = 0
-for page in pages:
-    page = page.split(",")
-    page_relation = get_page_relation(page)
-    violations = page_violates_rules(anti_rules_relation, page_relation)
-    if not violations:
-        s1 += int(page[len(page) // 2])
-    else:
-        corrected_page = correct_violations(page, anti_rules_relation, page_relation)
-        s2 += int(corrected_page[len(corrected_page) // 2])
-
-
-print("Middle number sum of correctly-ordered updates:", s1)
-print("Middle number sum of corrected updates:", s2)
+def parse(text):
+    ordering_rules, pages = text.split("\n\n")
+    ordering_rules = ordering_rules.strip().split("\n")
+    pages = pages.strip().split("\n")
+
+    rules = array("q")
+    for rule in get_rules_relation(ordering_rules):
+        rules.extend(rule)
+
+    # all updates back to back in `pages`; update i is pages[offsets[i]:offsets[i + 1]]
+    page_numbers = array("q")
+    offsets = array("q", [0])
+    for page in pages:
+        page_numbers.extend(int(p) for p in page.split(","))
+        offsets.append(len(page_numbers))
+
+    return {"rules": rules, "pages": page_numbers, "offsets": offsets}
+
+
+def unpack(data) -> List[List[int]]:
+    pages, offsets = data["pages"], data["offsets"]
+    return [list(pages[offsets[i] : offsets[i + 1]]) for i in range(len(offsets) - 1)]
+
+
+class RuleCycleError(ValueError):
+    """Raised when the rules between an update's pages contain a cycle."""
+
+    def __init__(self, cycle: List[int]):
+        self.cycle = cycle
+        super().__init__("rules form a cycle: " + " -> ".join(map(str, cycle)))
+
+
+class RuleIndex:
+    """
+    The ordering rules, indexed once.
+
+    Page numbers are interned to dense ids, and `after[i]` holds the ids of
+    the pages that must come after page id i. An update is checked in one
+    left-to-right pass: page p is out of order if something that has to
+    follow it was already seen. Each check is a C-level `isdisjoint` over the
+    smaller of the two sets, instead of pairing up every two pages.
+    """
+
+    def __init__(self, rules: Iterable[Tuple[int, int]]):
+        self.ids: Dict[int, int] = {}
+        pairs = [(self.intern(a), self.intern(b)) for a, b in rules]
+        after = [set() for _ in self.ids]
+        for a, b in pairs:
+            after[a].add(b)
+        self.after: List[FrozenSet[int]] = [frozenset(pages) for pages in after]
+
+    @classmethod
+    def from_data(cls, data) -> "RuleIndex":
+        rules = data["rules"]
+        return cls(zip(rules[0::2], rules[1::2]))
+
+    def intern(self, page: int) -> int:
+        return self.ids.setdefault(page, len(self.ids))
+
+    def is_ordered(self, update: Iterable[int]) -> bool:
+        ids, after = self.ids, self.after
+        seen = set()
+        for page in update:
+            i = ids.get(page)
+            if i is None:
+                # no rule mentions this page
+                continue
+            if not after[i].isdisjoint(seen):
+                return False
+            seen.add(i)
+        return True
+
+    def order(self, update: Sequence[int]) -> List[int]:
+        """
+        Sort an update by the rules between its own pages.
+
+        Kahn's topological sort over the rules induced by the update. Among
+        the pages that are free to go next, the one that came first in the
+        update is taken, so pages the rules do not constrain keep their
+        relative order. A page listed more than once keeps every copy, and
+        each copy has to satisfy the rules on its own, as in `is_ordered`.
+
+        Raises:
+            RuleCycleError: If the induced rules contain a cycle.
+        """
+        ids, after = self.ids, self.after
+        positions: Dict[int, List[int]] = defaultdict(list)
+        for i, page in enumerate(update):
+            if page in ids:
+                positions[ids[page]].append(i)
+        present = set(positions)
+        successors: List[List[int]] = [[] for _ in update]
+        indegree = [0] * len(update)
+        for a, sources in positions.items():
+            for b in after[a] & present:
+                for j in positions[b]:
+                    for i in sources:
+                        # a rule a|a only constrains two different copies of a
+                        if i != j:
+                            successors[i].append(j)
+                            indegree[j] += 1
+
+        ready = [i for i in range(len(update)) if not indegree[i]]
+        heapq.heapify(ready)
+        ordered = []
+        while ready:
+            i = heapq.heappop(ready)
+            ordered.append(update[i])
+            for j in successors[i]:
+                indegree[j] -= 1
+                if not indegree[j]:
+                    heapq.heappush(ready, j)
+
+        if len(ordered) < len(update):
+            raise RuleCycleError(self._find_cycle(update, successors, indegree))
+        return ordered
+
+    @staticmethod
+    def _find_cycle(
+        update: Sequence[int], successors: List[List[int]], indegree: List[int]
+    ) -> List[int]:
+        """
+        Every page Kahn's sort left behind has a left-behind predecessor, so
+        walking predecessors from one of them must come back round.
+        """
+        predecessor = {}
+        for i, targets in enumerate(successors):
+            if indegree[i]:
+                for j in targets:
+                    if indegree[j]:
+                        predecessor[j] = i
+        walk = {}
+        i = next(iter(predecessor))
+        while i not in walk:
+            walk[i] = len(walk)
+            i = predecessor[i]
+        cycle = list(walk)[walk[i] :][::-1]
+        return [update[j] for j in cycle + cycle[:1]]
+
+
+def part1(data):
+    index = RuleIndex.from_data(data)
+    pages = unpack(data)
+
+    s1 = 0
+    for page in pages:
+        if index.is_ordered(page):
+            s1 += page[len(page) // 2]
+    return s1
+
+
+def part2(data):
+    index = RuleIndex.from_data(data)
+    pages = unpack(data)
+
+    s2 = 0
+    for i, page in enumerate(pages):
+        if not index.is_ordered(page):
+            try:
+                corrected_page = index.order(page)
+            except RuleCycleError as e:
+                print(f"skipping update {i + 1}: {e}", file=sys.stderr)
+                continue
+            s2 += corrected_page[len(corrected_page) // 2]
+    return s2
+
+
+if __name__ == "__main__":
+    data = load_cached(input_data_path, parse)
+
+    print("Middle number sum of correctly-ordered updates:", part1(data))
+    print("Middle number sum of corrected updates:", part2(data))
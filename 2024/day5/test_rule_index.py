@@ -0,0 +1,68 @@
+import pathlib
+import random
+import sys
+from itertools import permutations
+
+import pytest
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+from aoc.runner import load_day  # noqa: E402
+
+day5 = load_day("2024", 5)
+
+
+def brute_force_ordered(rules, update):
+    return not any(
+        (update[j], update[i]) in rules
+        for i in range(len(update))
+        for j in range(i + 1, len(update))
+    )
+
+
+def test_unpack_returns_the_updates():
+    data = day5.parse("1|2\n\n1,2,3\n4,5\n")
+    assert day5.unpack(data) == [[1, 2, 3], [4, 5]]
+
+
+def test_duplicate_pages_are_ordered_copy_by_copy():
+    index = day5.RuleIndex([(1, 2), (2, 3)])
+    assert not index.is_ordered([1, 2, 1])
+    assert index.order([1, 2, 1]) == [1, 1, 2]
+    assert index.order([3, 2, 3, 1]) == [1, 2, 3, 3]
+    assert index.order([2, 7, 2]) == [2, 7, 2]
+
+
+def test_duplicate_pages_with_a_self_rule_form_a_cycle():
+    index = day5.RuleIndex([(1, 1)])
+    assert index.order([1]) == [1]
+    with pytest.raises(day5.RuleCycleError) as error:
+        index.order([1, 1])
+    assert error.value.cycle == [1, 1, 1]
+
+
+def test_order_matches_brute_force():
+    rng = random.Random(0)
+    for _ in range(2000):
+        pages = list(range(10, 10 + rng.randrange(2, 6)))
+        rules = {tuple(rng.sample(pages, 2)) for _ in range(rng.randrange(0, 12))}
+        index = day5.RuleIndex(rules)
+        update = [rng.choice(pages) for _ in range(rng.randrange(1, 7))]
+        assert index.is_ordered(update) == brute_force_ordered(rules, update)
+
+        valid = any(
+            brute_force_ordered(rules, list(candidate))
+            for candidate in permutations(update)
+        )
+        if not valid:
+            with pytest.raises(day5.RuleCycleError) as error:
+                index.order(update)
+            cycle = error.value.cycle
+            assert cycle[0] == cycle[-1]
+            assert all(pair in rules for pair in zip(cycle, cycle[1:]))
+            continue
+
+        ordered = index.order(update)
+        assert sorted(ordered) == sorted(update)
+        assert brute_force_ordered(rules, ordered)
+        if brute_force_ordered(rules, update):
+            assert ordered == update
@@ -0,0 +1,145 @@
+"""
+Benchmark the loop detectors on sequences from `generate_cycling_pairs`.
+
+Every detector runs on the same sequence: `padding` distinct values followed by
+a cycle of `cycle` distinct values, repeated long enough for Brent's and
+Floyd's pointers to meet. Pairs are encoded as ints first, which is
+what the bitset detector needs and what the guard walks now use. For each run
+the table shows the time, the peak memory allocated by the detector
+(tracemalloc, measured in a second run) and whether the loop start and length
+match the generator's.
+
+    python bench_loops.py [--max-power 7] [--detectors hash brent ...]
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from array import array
+from itertools import islice
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from cycling_test import generate_cycling_pairs, pair_value_range
+from loops import LoopDetector, find_cycle
+
+# returns (loop_start, loop_length), None if no loop was found; a loop_start of
+# None means the detector does not report it
+Loop = Optional[Tuple[Optional[int], int]]
+Detector = Callable[[Sequence[int], int], Loop]
+
+
+def _sequence_detector(method: str) -> Detector:
+    def detect(sequence, universe):
+        return find_cycle(sequence, method)
+
+    return detect
+
+
+def _streaming_detector(method: str) -> Detector:
+    def detect(sequence, universe):
+        detector = LoopDetector(method, size=universe)
+        for state in sequence:
+            if detector.push(state):
+                break
+        if not detector.is_loop:
+            return None
+        loop_start = detector.loop_start if method != "brent" else None
+        return loop_start, detector.loop_length
+
+    return detect
+
+
+DETECTORS: Dict[str, Detector] = {
+    "sequence-hash": _sequence_detector("hash"),
+    "sequence-brent": _sequence_detector("brent"),
+    "sequence-floyd": _sequence_detector("floyd"),
+    "stream-hash": _streaming_detector("hash"),
+    "stream-brent": _streaming_detector("brent"),
+    "stream-bitset": _streaming_detector("bitset"),
+}
+
+
+def build_sequence(cycle: int, padding: int) -> Tuple[array, int]:
+    """
+    Return the encoded sequence and the number of distinct encodings possible.
+    """
+    side = pair_value_range(cycle)
+    # padding coordinates start at `side`, see generate_cycling_pairs
+    stride = side + pair_value_range(padding)
+    # Floyd's hare meets the tortoise within 2 * (padding + cycle) values and
+    # Brent's within 3 * (padding + cycle)
+    length = 4 * (padding + cycle) + 2
+    num_cycles = -(-(length - padding) // cycle)
+    pairs = generate_cycling_pairs(cycle, num_cycles, padding)
+    sequence = array("q", (x * stride + y for (x, y), _ in islice(pairs, length)))
+    return sequence, stride * stride
+
+
+def run(
+    detector: Detector, sequence: Sequence[int], universe: int
+) -> Tuple[float, int, Loop]:
+    start = time.perf_counter()
+    found = detector(sequence, universe)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    detector(sequence, universe)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, found
+
+
+def _format_bytes(n: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GiB"
+
+
+def _check(found: Optional[int], expected: int) -> str:
+    if found is None:
+        return "-"
+    return "ok" if found == expected else str(found)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--max-power",
+        type=int,
+        default=6,
+        help="largest cycle and padding length as a power of ten (7 needs a few GB)",
+    )
+    parser.add_argument(
+        "--detectors", nargs="+", choices=sorted(DETECTORS), default=list(DETECTORS)
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    powers = sorted({p for p in (0, 2, 4, 6) if p <= args.max_power} | {args.max_power})
+    sizes = [10**p for p in powers]
+
+    header = f"{'detector':<16}{'cycle':>10}{'padding':>10}{'time':>12}{'peak':>12}"
+    print(header + f"{'start':>10}{'length':>10}")
+    for cycle in sizes:
+        for padding in [0] + sizes:
+            sequence, universe = build_sequence(cycle, padding)
+            for name in args.detectors:
+                elapsed, peak, found = run(DETECTORS[name], sequence, universe)
+                if found is None:
+                    result = f"{'missed':>10}{'missed':>10}"
+                else:
+                    result = f"{_check(found[0], padding):>10}"
+                    result += f"{_check(found[1], cycle):>10}"
+                print(
+                    f"{name:<16}{cycle:>10}{padding:>10}"
+                    f"{elapsed * 1000:>9.2f} ms{_format_bytes(peak):>12}{result}"
+                )
+            del sequence
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,23 @@
-from random import choice, randint, shuffle
-from time import sleep
-from typing import Dict, Generator, List, Optional, Sequence, Set, Tuple
+import argparse
+import pathlib
+import sys
+from array import array
+from math import isqrt
+from random import sample
+from typing import Generator, Set, Tuple
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+from aoc.grid import Grid  # noqa: E402
+from guard_trace import record_trace, replay, write_trace  # noqa: E402
+from states import decode_state  # noqa: E402
+
+
+def pair_value_range(count: int) -> int:
+    """
+    Side of the square of coordinates that `generate_cycling_pairs` draws `count`
+    distinct pairs from (at least 11, as with the original fixed range 0..10).
+    """
+    return max(10, isqrt(2 * count)) + 1
 
 
 def generate_cycling_pairs(
@@ -20,127 +37,60 @@ def generate_cycling_pairs(
         Tuple[Tuple[int, int], int]: A tuple containing a coordinate pair and an index. The index is -1 for padding pairs and
         ranges from 0 to cycle_length-1 for cycling pairs.
     """
-    max_cycle_pair_value = 10
-    pairs = set()
-    while len(pairs) < cycle_length:
-        pairs.add((randint(0, max_cycle_pair_value), randint(0, max_cycle_pair_value)))
-    padding = set()
-    while len(padding) < padding_length:
-        padding.add(
-            (
-                randint(max_cycle_pair_value + 1, max_cycle_pair_value + 10),
-                randint(max_cycle_pair_value + 1, max_cycle_pair_value + 10),
-            )
-        )
+    # distinct pairs are drawn by index from a square wide enough for them all;
+    # padding pairs come from a disjoint square below and to the right of it
+    side = pair_value_range(cycle_length)
+    padding_side = pair_value_range(padding_length)
+    pairs = array("q", sample(range(side * side), cycle_length))
+    padding = array("q", sample(range(padding_side * padding_side), padding_length))
 
-    padding = list(padding)
-    pairs = list(pairs)
-    for coord in padding:
-        yield coord, -1
+    for i in padding:
+        x, y = divmod(i, padding_side)
+        yield (side + x, side + y), -1
 
     if num_cycles == -1:
         while True:
-            for i, coord in enumerate(pairs):
-                yield coord, i
+            for i, pair in enumerate(pairs):
+                yield divmod(pair, side), i
     else:
         for _ in range(num_cycles):
-            for i, coord in enumerate(pairs):
-                yield coord, i
-
-
-def detect_in_loop(
-    coords_sequence: Sequence[Tuple[int, int, chr]]
-) -> Tuple[bool, Optional[List[Tuple[int, int]]], int]:
-    """
-    Detect if sequence contains a loop and return loop information.
-
-    Returns:
-        Tuple containing:
-        - bool: Whether loop was detected
-        - List: Loop sequence if found, None otherwise
-        - int: Length of the loop (0 if no loop)
-    """
-    position_history: Dict[Tuple[int, int, chr], int] = {}
-
-    for i, pos in enumerate(coords_sequence):
-        if pos in position_history:
-            # Loop found - calculate loop sequence
-            loop_start = position_history[pos]
-            loop_sequence = list(coords_sequence[loop_start:i])
-            return True, loop_sequence, len(loop_sequence)
-        position_history[pos] = i
-
-    return False, None, 0
+            for i, pair in enumerate(pairs):
+                yield divmod(pair, side), i
 
 
 def locate_starting_pos(
-    grid: List[List[chr]], start_symbols: Set[chr] = {"^", "v", "<", ">"}
+    grid: Grid, start_symbols: Set[chr] = {"^", "v", "<", ">"}
 ) -> Tuple[int, int, chr]:
     """
     Locate the starting position in a grid based on specified start symbols.
 
     Args:
-        grid (List[List[chr]]): A 2D list representing the grid.
+        grid (Grid): The map.
         start_symbols (Set[chr], optional): A set of characters representing the start symbols. Defaults to {"^", "v", "<", ">"}.
 
     Returns:
         Tuple[int, int, chr]: A tuple containing the row index, column index, and the start symbol found.
                               Returns (-1, -1, "") if no start symbol is found.
     """
-    for i in range(len(grid)):
-        j = [idx for idx in range(len(grid[i])) if grid[i][idx] in start_symbols]
-        if len(j) == 1:
-            j = j[0]
-            return i, j, grid[i][j]
+    for symbol in start_symbols:
+        pos = grid.find(symbol)
+        if pos is not None:
+            return pos[0], pos[1], symbol
     return -1, -1, ""
 
 
-def step(
-    grid: List[List[chr]],
-    curr_pos: Tuple[int, int, chr],
-    next_direction_map: Dict[chr, chr] = {"^": ">", ">": "v", "v": "<", "<": "^"},
-) -> Tuple[int, int, chr]:
-    """
-    Move a position in a grid based on the current direction and handle obstacles.
-
-    Args:
-        grid (List[List[chr]]): A 2D list representing the grid where each cell can be a character.
-        curr_pos (Tuple[int, int, chr]): A tuple containing the current x and y coordinates and the direction.
-        next_direction_map (Dict[chr, chr], optional): A dictionary mapping the current direction to the next direction
-            when an obstacle is encountered. Defaults to {"^": ">", ">": "v", "v": "<", "<": "^"}.
-
-    Returns:
-        Tuple[int, int, chr]: A tuple containing the new x and y coordinates and the new direction.
-    """
-
-    def _get_dx_dy(direction):
-        dx = 1 if direction == "v" else -1 if direction == "^" else 0
-        dy = 1 if direction == ">" else -1 if direction == "<" else 0
-        return dx, dy
-
-    x, y, direction = curr_pos
-    dx, dy = _get_dx_dy(direction)
-    height, width = len(grid), len(grid[0])
-
-    new_x, new_y = x + dx, y + dy
-
-    if not (0 <= new_x < height and 0 <= new_y < width):
-        return new_x, new_y, ""
-
-    if grid[new_x][new_y] == "#":
-        direction = next_direction_map[direction]
-
-        dx, dy = _get_dx_dy(direction=direction)
-        new_x, new_y = x + dx, y + dy
-
-    return new_x, new_y, direction
-
-
 if __name__ == "__main__":
-
-    original_data = [
-        list(d.strip())
-        for d in [
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-iterations", type=int, default=10_000)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--speed", type=float, default=4.0, help="steps per second")
+    parser.add_argument(
+        "--trace-dir", type=pathlib.Path, help="also write each walk's trace here"
+    )
+    args = parser.parse_args()
+
+    data = Grid.from_lines(
+        [
             "...#.......",
             ".........#.",
             "...........",
@@ -153,58 +103,32 @@ if __name__ == "__main__":
             "#..........",
             "........#..",
         ]
-    ]
+    )
+    start_location = locate_starting_pos(grid=data)
 
     for obstacle_coordinate in [(9, 2), (7, 0), (7, 2)]:
-        data = [row.copy() for row in original_data]
-        data[obstacle_coordinate[0]][obstacle_coordinate[1]] = "#"
         print("=" * 50)
         print("the obstacle is at:", obstacle_coordinate)
-        for row in data:
-            print("".join(row))
-        print()
-
-        x, y, direction = locate_starting_pos(grid=data)
-        start_location = (x, y, direction)
-        pos = (x, y, direction)
-        traversal_coords = []
-
-        is_loop = False
-        loop_seq = []
-        loop_len = 0
-        display_grid = [data[i].copy() for i in range(len(data))]
-
-        max_iterations = 10_000  # Set a maximum iteration limit
-        iteration_count = 0
-        while direction and iteration_count < max_iterations:
-            iteration_count += 1
-            pos = (x, y, direction)
-            display_grid[x][y] = direction
-
-            traversal_coords.append(pos)
-            x, y, direction = step(grid=data, curr_pos=pos)
-
-            display_grid[x][y] = "@"
-            for row in display_grid:
-                print("".join(row))
-            print()
-            sleep(0.25)
-
-            is_loop, loop_seq, loop_len = detect_in_loop(traversal_coords)
-            if is_loop:
-                break
 
+        trace = record_trace(
+            data,
+            start_location,
+            max_steps=args.max_iterations,
+            obstacle=obstacle_coordinate,
+        )
+        if args.trace_dir is not None:
+            name = "cycling_{}_{}.trace".format(*obstacle_coordinate)
+            write_trace(args.trace_dir.joinpath(name), trace)
+        replay(trace, fps=args.fps, speed=args.speed)
+
+        is_loop = trace.status == "looped"
+        loop_seq = None
+        if is_loop:
+            loop_seq = [
+                decode_state(state, data.width)
+                for state in trace.states[trace.loop_start :]
+            ]
         print(f"Loop detected: {is_loop}")
         print(f"Loop sequence: {loop_seq}")
-        print(f"Loop length: {loop_len}")
-        print()
-
-        display_grid = [data[i].copy() for i in range(len(data))]
-        for coord in loop_seq:
-            x, y, _ = coord
-            display_grid[x][y] = "O"
-        display_grid[start_location[0]][start_location[1]] = start_location[2]
-        for row in display_grid:
-            print("".join(row))
-
+        print(f"Loop length: {len(loop_seq) if is_loop else 0}")
         print("=" * 50)
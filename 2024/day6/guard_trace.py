@@ -0,0 +1,243 @@
+"""
+Record guard walks to a compact binary trace and replay them in a terminal.
+
+A trace file is a fixed header, the map's cells and the walk's encoded states
+(see `states.py`) as little-endian int64s. Recording stops when the guard
+exits, repeats a state or reaches `max_steps`.
+
+The replay draws the map once. After that it only sends the cells that changed
+since the previous frame, as ANSI cursor moves. Frames are capped at `fps`.
+The walk advances at `speed` steps per second of wall-clock time. When drawing
+falls behind, whole steps are folded into the next frame instead of slowing
+the replay down. A 130x130 map therefore costs a few bytes of output per step,
+not a full screen.
+
+    python guard_trace.py record MAP -o walk.trace [--obstacle R C] [--max-steps N]
+    python guard_trace.py replay walk.trace [--fps 30] [--speed 200]
+"""
+
+import argparse
+import pathlib
+import struct
+import sys
+import time
+from array import array
+from typing import Dict, List, NamedTuple, Optional, TextIO, Tuple
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+from aoc.grid import Grid  # noqa: E402
+from loops import LoopDetector  # noqa: E402
+from states import EXITED, decode_state, encode_state, state_count, step  # noqa: E402
+
+MAGIC = b"AOCTRACE"
+FORMAT_VERSION = 1
+
+# magic, version, status, height, width, number of states, loop start
+_header = struct.Struct("<8sHHIIQq")
+
+STATUSES = ("exited", "looped", "capped")
+
+
+class Trace(NamedTuple):
+    grid: Grid
+    states: array
+    status: str
+    # index of the first state of the loop, -1 unless status is "looped"
+    loop_start: int = -1
+
+
+def record_trace(
+    grid: Grid,
+    start_pos: Tuple[int, int, str],
+    max_steps: int = 10_000,
+    obstacle: Optional[Tuple[int, int]] = None,
+) -> Trace:
+    """
+    Walk the guard from `start_pos`, with `obstacle` added if given.
+    """
+    detector = LoopDetector("bitset", size=state_count(grid))
+    state = encode_state(*start_pos, grid.width)
+    status = "capped"
+
+    checkpoint = grid.checkpoint()
+    if obstacle is not None:
+        grid.set(*obstacle, "#")
+    try:
+        recorded = grid.copy()
+        while len(detector.history) < max_steps:
+            if detector.push(state):
+                status = "looped"
+                break
+            state = step(grid, state)
+            if state == EXITED:
+                status = "exited"
+                break
+    finally:
+        grid.undo(checkpoint)
+
+    return Trace(recorded, detector.history, status, detector.loop_start)
+
+
+def write_trace(path: pathlib.Path, trace: Trace):
+    states = array("q", trace.states)
+    if sys.byteorder != "little":
+        states.byteswap()
+    with open(path, "wb") as trace_file:
+        trace_file.write(
+            _header.pack(
+                MAGIC,
+                FORMAT_VERSION,
+                STATUSES.index(trace.status),
+                trace.grid.height,
+                trace.grid.width,
+                len(states),
+                trace.loop_start,
+            )
+        )
+        trace_file.write(trace.grid.view())
+        trace_file.write(states)
+
+
+def read_trace(path: pathlib.Path) -> Trace:
+    with open(path, "rb") as trace_file:
+        header = trace_file.read(_header.size)
+        if len(header) < _header.size:
+            raise ValueError(f"{path} is not a guard trace")
+        magic, version, status, height, width, count, loop_start = _header.unpack(
+            header
+        )
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} guard trace")
+        cells = bytearray(trace_file.read(height * width))
+        states = array("q")
+        states.frombytes(trace_file.read(count * states.itemsize))
+    if len(cells) != height * width or len(states) != count:
+        raise ValueError(f"{path} is truncated")
+    if sys.byteorder != "little":
+        states.byteswap()
+    return Trace(Grid(cells, width, height), states, STATUSES[status], loop_start)
+
+
+class Renderer:
+    """
+    Keeps what the terminal shows and emits only the cells that differ.
+    """
+
+    def __init__(self, grid: Grid, out: TextIO = sys.stdout):
+        self.screen = grid.copy()
+        self.out = out
+        self._dirty: Dict[Tuple[int, int], str] = {}
+
+    def draw_all(self):
+        self.out.write("\x1b[2J\x1b[H" + "\n".join(self.screen.lines()) + "\n")
+        self.out.flush()
+
+    def set(self, r: int, c: int, value: str):
+        if self.screen[r, c] != value:
+            self._dirty[r, c] = value
+        else:
+            self._dirty.pop((r, c), None)
+
+    def flush(self):
+        parts: List[str] = []
+        for (r, c), value in self._dirty.items():
+            self.screen[r, c] = value
+            parts.append(f"\x1b[{r + 1};{c + 1}H{value}")
+        self._dirty.clear()
+        # park the cursor under the map
+        parts.append(f"\x1b[{self.screen.height + 1};1H")
+        self.out.write("".join(parts))
+        self.out.flush()
+
+
+def replay(
+    trace: Trace,
+    fps: float = 30.0,
+    speed: float = 200.0,
+    out: TextIO = sys.stdout,
+):
+    """
+    Animate a trace: visited cells show the direction they were left in, the
+    guard is "@", and the loop (if any) is marked "O" at the end.
+
+    Args:
+        trace (Trace): The recorded walk.
+        fps (float, optional): Maximum frames per second. Defaults to 30.
+        speed (float, optional): Steps per second; 0 jumps to the end. Defaults to 200.
+        out (TextIO, optional): Where to write. Defaults to sys.stdout.
+    """
+    width = trace.grid.width
+    renderer = Renderer(trace.grid, out)
+    renderer.draw_all()
+
+    states = trace.states
+    shown = 0
+    guard: Optional[Tuple[int, int]] = None
+    previous_direction = ""
+    start = time.monotonic()
+    frame_time = 1 / fps
+    while shown < len(states):
+        if speed > 0:
+            due = int((time.monotonic() - start) * speed) + 1
+        else:
+            due = len(states)
+        # everything that became due since the last frame goes into this one
+        for state in states[shown:due]:
+            x, y, direction = decode_state(state, width)
+            if guard is not None:
+                renderer.set(*guard, previous_direction)
+            renderer.set(x, y, "@")
+            guard, previous_direction = (x, y), direction
+        shown = max(shown, min(due, len(states)))
+        renderer.flush()
+        if shown < len(states):
+            time.sleep(frame_time)
+
+    if guard is not None:
+        renderer.set(*guard, previous_direction)
+    if trace.status == "looped":
+        for state in states[trace.loop_start :]:
+            x, y, _ = decode_state(state, width)
+            renderer.set(x, y, "O")
+    renderer.flush()
+    out.write(f"{trace.status} after {len(states)} states\n")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="walk a map and write its trace")
+    record.add_argument("map", type=pathlib.Path)
+    record.add_argument("-o", "--output", type=pathlib.Path, required=True)
+    record.add_argument("--obstacle", type=int, nargs=2, metavar=("R", "C"))
+    record.add_argument("--max-steps", type=int, default=10_000)
+
+    play = commands.add_parser("replay", help="animate a trace in the terminal")
+    play.add_argument("trace", type=pathlib.Path)
+    play.add_argument("--fps", type=float, default=30.0)
+    play.add_argument("--speed", type=float, default=200.0, help="steps per second")
+
+    args = parser.parse_args(argv)
+    if args.command == "record":
+        from main import locate_starting_pos
+
+        grid = Grid.from_text(args.map.read_text())
+        start_pos = locate_starting_pos(grid)
+        if not start_pos[2]:
+            parser.error(f"no guard on the map in {args.map}")
+        trace = record_trace(
+            grid,
+            start_pos,
+            max_steps=args.max_steps,
+            obstacle=tuple(args.obstacle) if args.obstacle else None,
+        )
+        write_trace(args.output, trace)
+        print(f"{trace.status} after {len(trace.states)} states -> {args.output}")
+    else:
+        trace = read_trace(args.trace)
+        replay(trace, fps=args.fps, speed=args.speed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Per-row and per-column obstacle index for the guard simulation.
+
+Instead of walking one cell at a time until the next "#", the guard's stopping
+cell in any direction is found with a binary search over the sorted obstacle
+coordinates of its row or column. One extra obstacle can be supplied per query,
+which is how the obstacle trials test a candidate cell without rebuilding the
+index.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Tuple
+
+from aoc.grid import Grid
+from states import DIRECTIONS, EXITED
+
+
+class JumpTable:
+    def __init__(self, grid: Grid, obstacle: str = "#"):
+        self.height, self.width = grid.height, grid.width
+        # obstacle columns of each row and obstacle rows of each column, sorted
+        self.rows: List[List[int]] = [[] for _ in range(self.height)]
+        self.cols: List[List[int]] = [[] for _ in range(self.width)]
+        for r, c in grid.iter_find(obstacle):
+            self.rows[r].append(c)
+            self.cols[c].append(r)
+
+    def next_stop(
+        self,
+        x: int,
+        y: int,
+        direction: str,
+        extra: Optional[Tuple[int, int]] = None,
+    ) -> Tuple[int, int, bool]:
+        """
+        Find where the guard stops when moving from (x, y) in `direction`.
+
+        Args:
+            x (int): The current row.
+            y (int): The current column.
+            direction (str): One of "^", ">", "v", "<".
+            extra (Optional[Tuple[int, int]], optional): An additional obstacle to take into account. Defaults to None.
+
+        Returns:
+            Tuple[int, int, bool]: The last cell reached, and whether the guard was stopped by an
+                obstacle (True) or walked off the map (False).
+        """
+        if direction == "^":
+            col = self.cols[y]
+            i = bisect_left(col, x)
+            blocker = col[i - 1] if i else -1
+            if extra is not None and extra[1] == y and blocker < extra[0] < x:
+                blocker = extra[0]
+            return blocker + 1, y, blocker >= 0
+
+        if direction == "v":
+            col = self.cols[y]
+            i = bisect_right(col, x)
+            blocker = col[i] if i < len(col) else self.height
+            if extra is not None and extra[1] == y and x < extra[0] < blocker:
+                blocker = extra[0]
+            return blocker - 1, y, blocker < self.height
+
+        if direction == "<":
+            row = self.rows[x]
+            j = bisect_left(row, y)
+            blocker = row[j - 1] if j else -1
+            if extra is not None and extra[0] == x and blocker < extra[1] < y:
+                blocker = extra[1]
+            return x, blocker + 1, blocker >= 0
+
+        if direction == ">":
+            row = self.rows[x]
+            j = bisect_right(row, y)
+            blocker = row[j] if j < len(row) else self.width
+            if extra is not None and extra[0] == x and y < extra[1] < blocker:
+                blocker = extra[1]
+            return x, blocker - 1, blocker < self.width
+
+        raise ValueError(f"unknown direction {direction!r}")
+
+    def next_turn(self, state: int, extra: Optional[Tuple[int, int]] = None) -> int:
+        """
+        Jump from an encoded state to the state after the guard's next turn.
+
+        Returns:
+            int: The encoded state in front of the next obstacle, already facing
+                the new direction, or EXITED if the guard walks off the map.
+        """
+        cell, d = divmod(state, 4)
+        x, y = divmod(cell, self.width)
+        x, y, blocked = self.next_stop(x, y, DIRECTIONS[d], extra)
+        if not blocked:
+            return EXITED
+        return (x * self.width + y) * 4 + (d + 1) % 4
@@ -0,0 +1,173 @@
+"""
+Lockstep simulation of many obstacle trials at once with NumPy.
+
+Every candidate obstacle is one row of a batch. Each iteration moves all live
+trials one jump, to their next turn state or off the map, with a few array
+operations. A trial retires when it exits or reaches a turn state it has seen
+before. Seen turn states are kept in a packed per-trial bitmap. Only turn
+states are tracked there: the base map's states get compact ids, and the four
+turn states in front of each trial's own obstacle share four extra ids.
+
+Needs numpy.
+"""
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from jump_table import JumpTable
+from states import DX, DY, EXITED, UNSEEN, Walk
+
+
+def _stop_tables(blocked_cells: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    For every cell and direction, the coordinate along the direction's axis
+    where the guard stops, and whether an obstacle stops it there.
+    """
+    height, width = blocked_cells.shape
+    rows = np.arange(height)[:, None]
+    cols = np.arange(width)[None, :]
+    stop = np.empty((4, height, width), dtype=np.int64)
+    blocked = np.empty((4, height, width), dtype=bool)
+
+    # "^": nearest obstacle row above
+    above = np.maximum.accumulate(np.where(blocked_cells, rows, -1), axis=0)
+    above = np.vstack([np.full((1, width), -1), above[:-1]])
+    stop[0], blocked[0] = above + 1, above >= 0
+
+    # "v": nearest obstacle row below
+    below = np.where(blocked_cells, rows, height)[::-1]
+    below = np.minimum.accumulate(below, axis=0)[::-1]
+    below = np.vstack([below[1:], np.full((1, width), height)])
+    stop[2], blocked[2] = below - 1, below < height
+
+    # "<": nearest obstacle column to the left
+    left = np.maximum.accumulate(np.where(blocked_cells, cols, -1), axis=1)
+    left = np.hstack([np.full((height, 1), -1), left[:, :-1]])
+    stop[3], blocked[3] = left + 1, left >= 0
+
+    # ">": nearest obstacle column to the right
+    right = np.where(blocked_cells, cols, width)[:, ::-1]
+    right = np.minimum.accumulate(right, axis=1)[:, ::-1]
+    right = np.hstack([right[:, 1:], np.full((height, 1), width)])
+    stop[1], blocked[1] = right - 1, right < width
+
+    return stop.reshape(4, -1), blocked.reshape(4, -1)
+
+
+class LockstepSimulator:
+    def __init__(
+        self, table: JumpTable, walk: Optional[Walk] = None, batch_size: int = 4096
+    ):
+        self.height, self.width = table.height, table.width
+        self.walk = walk
+        self.batch_size = batch_size
+
+        blocked_cells = np.zeros((self.height, self.width), dtype=bool)
+        for r, row in enumerate(table.rows):
+            blocked_cells[r, row] = True
+        self._stop, self._blocked = _stop_tables(blocked_cells)
+
+        # compact ids of the turn states in front of the map's obstacles
+        self._turn_id = np.full(self.height * self.width * 4, -1, dtype=np.int64)
+        obstacle_x, obstacle_y = np.nonzero(blocked_cells)
+        for d in range(4):
+            x, y = obstacle_x - DX[d], obstacle_y - DY[d]
+            inside = (x >= 0) & (x < self.height) & (y >= 0) & (y < self.width)
+            x, y = x[inside], y[inside]
+            x, y = x[~blocked_cells[x, y]], y[~blocked_cells[x, y]]
+            self._turn_id[(x * self.width + y) * 4 + (d + 1) % 4] = 0
+        is_turn = self._turn_id == 0
+        self.n_turns = int(is_turn.sum())
+        self._turn_id[is_turn] = np.arange(self.n_turns)
+
+        if walk is not None:
+            self._state_index = np.frombuffer(walk.state_index, dtype=np.int64)
+            self._walk_states = np.frombuffer(walk.states, dtype=np.int64)
+
+    def _jump(
+        self, state: np.ndarray, obstacle_x: np.ndarray, obstacle_y: np.ndarray
+    ) -> np.ndarray:
+        cell, d = state >> 2, state & 3
+        x, y = cell // self.width, cell % self.width
+        stop = self._stop[d, cell]
+        blocked = self._blocked[d, cell]
+
+        # the trial's own obstacle, if it sits between the guard and the stop
+        vertical = (d & 1) == 0
+        same_line = np.where(vertical, obstacle_y == y, obstacle_x == x)
+        along = np.where(vertical, obstacle_x, obstacle_y)
+        here = np.where(vertical, x, y)
+        backwards = (d == 0) | (d == 3)
+        between = np.where(
+            backwards,
+            (stop <= along) & (along < here),
+            (here < along) & (along <= stop),
+        )
+        hit = same_line & between
+        stop = np.where(hit, np.where(backwards, along + 1, along - 1), stop)
+        blocked = blocked | hit
+
+        stop_x = np.where(vertical, stop, x)
+        stop_y = np.where(vertical, y, stop)
+        next_state = (stop_x * self.width + stop_y) * 4 + (d + 1) % 4
+        return np.where(blocked, next_state, EXITED)
+
+    def detect_loops(
+        self,
+        obstacles: Sequence[Tuple[int, int]],
+        start_state: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Return a boolean array: does the guard loop with each obstacle added?
+
+        With a walk, each trial resumes just before the obstacle's cell and the
+        walk's earlier states count as visited, like main2.detect_loop.
+        Otherwise every trial starts from `start_state`.
+        """
+        obstacles = np.asarray(obstacles, dtype=np.int64).reshape(-1, 2)
+        loops = np.zeros(len(obstacles), dtype=bool)
+        for lo in range(0, len(obstacles), self.batch_size):
+            batch = obstacles[lo : lo + self.batch_size]
+            loops[lo : lo + len(batch)] = self._run_batch(batch, start_state)
+        return loops
+
+    def _run_batch(self, obstacles: np.ndarray, start_state: Optional[int]):
+        n = len(obstacles)
+        loops = np.zeros(n, dtype=bool)
+        obstacle_x, obstacle_y = obstacles[:, 0], obstacles[:, 1]
+
+        if self.walk is not None:
+            first_visit = np.frombuffer(self.walk.first_visit, dtype=np.int64)
+            resume = first_visit[obstacle_x * self.width + obstacle_y]
+            resume = np.where(resume == UNSEEN, len(self._walk_states), resume)
+            state = self._walk_states[resume - 1]
+        else:
+            resume = np.zeros(n, dtype=np.int64)
+            state = np.full(n, start_state, dtype=np.int64)
+
+        # one bit per base turn state, plus four for the obstacle's own
+        visited = np.zeros((n, (self.n_turns + 4 + 7) // 8), dtype=np.uint8)
+        live = np.arange(n)
+        while len(live):
+            state = self._jump(state, obstacle_x, obstacle_y)
+            alive = state != EXITED
+            live, state, resume = live[alive], state[alive], resume[alive]
+            obstacle_x, obstacle_y = obstacle_x[alive], obstacle_y[alive]
+
+            if self.walk is not None:
+                seen = self._state_index[state] < resume
+            else:
+                seen = np.zeros(len(live), dtype=bool)
+
+            turn = self._turn_id[state]
+            turn = np.where(turn >= 0, turn, self.n_turns + (state & 3))
+            byte, bit = turn >> 3, (1 << (turn & 7)).astype(np.uint8)
+            seen |= (visited[live, byte] & bit) != 0
+            visited[live, byte] |= bit
+
+            loops[live[seen]] = True
+            keep = ~seen
+            live, state, resume = live[keep], state[keep], resume[keep]
+            obstacle_x, obstacle_y = obstacle_x[keep], obstacle_y[keep]
+        return loops
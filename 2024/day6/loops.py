@@ -0,0 +1,234 @@
+"""
+Cycle detection for guard walks.
+
+`detect_in_loop` inspects a finished sequence of states; `LoopDetector` is fed
+one state per step so the walk can stop as soon as it starts repeating,
+without rescanning its history on every step.
+
+The "brent" and "floyd" methods only need O(1) extra memory. They rely on the
+sequence being produced by a deterministic step function, i.e. equal states are
+always followed by equal states, which holds for the guard. A finite sequence
+may end after its first repeat but before their pointers meet; they then fall
+back to the "hash" scan, so all methods report the same loop.
+
+The streaming "bitset" method is for integer-encoded states (see `states.py`):
+membership is one byte per possible state instead of a hashed dict entry.
+"""
+
+from array import array
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from states import StateSet
+
+METHODS = ("hash", "brent", "floyd")
+
+LoopInfo = Tuple[bool, Optional[List[Hashable]], int]
+
+
+def _hash_cycle(coords_sequence: Sequence[Hashable]) -> Optional[Tuple[int, int]]:
+    position_history: Dict[Hashable, int] = {}
+
+    for i, pos in enumerate(coords_sequence):
+        if pos in position_history:
+            loop_start = position_history[pos]
+            return loop_start, i - loop_start
+        position_history[pos] = i
+
+    return None
+
+
+def _brent_cycle(coords_sequence: Sequence[Hashable]) -> Optional[Tuple[int, int]]:
+    n = len(coords_sequence)
+    if n < 2:
+        return None
+
+    # find the loop length: the tortoise teleports to the hare at powers of two
+    power = loop_length = 1
+    tortoise, hare = 0, 1
+    while coords_sequence[tortoise] != coords_sequence[hare]:
+        if power == loop_length:
+            tortoise = hare
+            power *= 2
+            loop_length = 0
+        hare += 1
+        loop_length += 1
+        if hare >= n:
+            # the sequence ended before the race did
+            return _hash_cycle(coords_sequence)
+
+    # find the loop start: walk two pointers loop_length apart from the beginning
+    tortoise, hare = 0, loop_length
+    while coords_sequence[tortoise] != coords_sequence[hare]:
+        tortoise += 1
+        hare += 1
+    return tortoise, loop_length
+
+
+def _floyd_cycle(coords_sequence: Sequence[Hashable]) -> Optional[Tuple[int, int]]:
+    n = len(coords_sequence)
+
+    # the hare moves two steps for every step of the tortoise until they meet
+    tortoise, hare = 1, 2
+    while hare < n and coords_sequence[tortoise] != coords_sequence[hare]:
+        tortoise += 1
+        hare += 2
+    if hare >= n:
+        # the sequence ended before the race did
+        return _hash_cycle(coords_sequence)
+
+    # the meeting point is a multiple of the loop length away from the start
+    loop_start, hare = 0, tortoise
+    while coords_sequence[loop_start] != coords_sequence[hare]:
+        loop_start += 1
+        hare += 1
+
+    loop_length = 1
+    while coords_sequence[loop_start] != coords_sequence[loop_start + loop_length]:
+        loop_length += 1
+    return loop_start, loop_length
+
+
+_cycle_finders = {"hash": _hash_cycle, "brent": _brent_cycle, "floyd": _floyd_cycle}
+
+
+def find_cycle(
+    coords_sequence: Sequence[Hashable], method: str = "hash"
+) -> Optional[Tuple[int, int]]:
+    """
+    Return (loop_start, loop_length) of the first repeat in the sequence, or None.
+    """
+    if method not in _cycle_finders:
+        raise ValueError(f"unknown loop detection method {method!r}")
+    return _cycle_finders[method](coords_sequence)
+
+
+def detect_in_loop(
+    coords_sequence: Sequence[Tuple[int, int, chr]], method: str = "hash"
+) -> Tuple[bool, Optional[List[Tuple[int, int]]], int]:
+    """
+    Detect if sequence contains a loop and return loop information.
+
+    Args:
+        coords_sequence (Sequence[Tuple[int, int, chr]]): The visited states, in order.
+        method (str, optional): "hash" remembers every state, "brent" and "floyd" use O(1) extra
+            memory unless the sequence ends before their pointers meet, in which case they
+            fall back to "hash". Defaults to "hash".
+
+    Returns:
+        Tuple containing:
+        - bool: Whether loop was detected
+        - List: Loop sequence if found, None otherwise
+        - int: Length of the loop (0 if no loop)
+    """
+    cycle = find_cycle(coords_sequence, method)
+    if cycle is None:
+        return False, None, 0
+    loop_start, loop_length = cycle
+    loop_sequence = list(coords_sequence[loop_start : loop_start + loop_length])
+    return True, loop_sequence, loop_length
+
+
+class LoopDetector:
+    """
+    Streaming loop detection: `push` each state as the walk produces it.
+
+    With method "hash" every state is remembered once, so a repeat is caught on
+    the step it happens and `result` returns the same loop sequence as
+    `detect_in_loop`. Method "bitset" behaves the same for int states in
+    `range(size)`; pass a shared `visited` set to reuse its buffer across
+    walks (it is cleared here).
+
+    With method "brent" only one saved state is kept, and `result` reports the
+    loop length but no loop sequence. The saved state is replaced at the
+    indices 2**k - 1, so the repeat is only noticed once a saved state lies in
+    the loop and its window 2**k has reached the loop length: after up to
+    2 * max(loop_start + 1, loop_length) + loop_length states. A long lead-in
+    to a short loop can therefore take many laps of the loop. Callers must
+    keep pushing states until `push` returns True; before that `result`
+    reports no loop.
+    """
+
+    def __init__(
+        self,
+        method: str = "hash",
+        size: int = 0,
+        visited: Optional[StateSet] = None,
+    ):
+        if method not in ("hash", "brent", "bitset"):
+            raise ValueError(f"unknown streaming loop detection method {method!r}")
+        self.method = method
+        self.is_loop = False
+        self.loop_start = -1
+        self.loop_length = 0
+        self.history: Sequence[Hashable] = []
+        self._first_seen: Dict[Hashable, int] = {}
+        if method == "bitset":
+            if visited is None:
+                visited = StateSet(size)
+            else:
+                visited.clear()
+            self.history = array("q")
+        self._visited = visited
+        self._saved: Optional[Hashable] = None
+        self._power = self._lam = 1
+        self._count = 0
+
+    def push(self, state: Hashable) -> bool:
+        """
+        Record the next state and return True once the walk is known to loop.
+        """
+        if self.is_loop:
+            return True
+        if self.method == "bitset":
+            return self._push_bitset(state)
+        if self.method == "hash":
+            return self._push_hash(state)
+        return self._push_brent(state)
+
+    def _push_bitset(self, state: int) -> bool:
+        if self._visited.add(state):
+            self.history.append(state)
+            return False
+        # only paid once per walk, when the loop closes
+        self.is_loop = True
+        self.loop_start = self.history.index(state)
+        self.loop_length = len(self.history) - self.loop_start
+        return True
+
+    def _push_hash(self, state: Hashable) -> bool:
+        i = len(self.history)
+        loop_start = self._first_seen.get(state)
+        if loop_start is not None:
+            self.is_loop = True
+            self.loop_start, self.loop_length = loop_start, i - loop_start
+            return True
+        self._first_seen[state] = i
+        self.history.append(state)
+        return False
+
+    def _push_brent(self, state: Hashable) -> bool:
+        self._count += 1
+        if self._count == 1:
+            self._saved = state
+            return False
+        if state == self._saved:
+            self.is_loop = True
+            self.loop_length = self._lam
+            return True
+        if self._power == self._lam:
+            self._saved = state
+            self._power *= 2
+            self._lam = 0
+        self._lam += 1
+        return False
+
+    def result(self) -> LoopInfo:
+        """
+        Return (is_loop, loop_sequence, loop_length) like `detect_in_loop`.
+        """
+        if not self.is_loop:
+            return False, None, 0
+        if self.method != "brent":
+            loop_sequence = list(self.history[self.loop_start :])
+            return True, loop_sequence, self.loop_length
+        return True, None, self.loop_length
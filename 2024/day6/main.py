@@ -1,11 +1,26 @@
+import argparse
 import pathlib
-from typing import Dict, Generator, List, Optional, Sequence, Set, Tuple
+import sys
+from typing import Optional, Set, Tuple
 
 current_dir = pathlib.Path(__file__).parent.resolve()
 input_data_path = current_dir.joinpath("input.txt")
 
-with open(input_data_path, "r") as input_file:
-    data = input_file.readlines()
+sys.path.append(str(current_dir.parents[1]))
+from aoc.cache import load_cached  # noqa: E402
+from aoc.grid import Grid  # noqa: E402
+from jump_table import JumpTable  # noqa: E402
+from loops import LoopDetector  # noqa: E402
+from parallel import run_trials  # noqa: E402
+from states import (  # noqa: E402
+    EXITED,
+    StateSet,
+    Walk,
+    decode_state,
+    encode_state,
+    state_count,
+    step,
+)
 
 
 _data = [
@@ -35,202 +50,173 @@ _data = [
     "........#..",
 ]
 
-data = [list(d.strip()) for d in data]
+
+def parse(text):
+    return {"grid": Grid.from_lines([d.strip() for d in text.splitlines()]).view()}
 
 
 def locate_starting_pos(
-    grid: List[List[chr]], start_symbols: Set[chr] = {"^", "v", "<", ">"}
+    grid: Grid, start_symbols: Set[chr] = {"^", "v", "<", ">"}
 ) -> Tuple[int, int, chr]:
     """
     Locate the starting position in a grid based on specified start symbols.
 
     Args:
-        grid (List[List[chr]]): A 2D list representing the grid.
+        grid (Grid): The map.
         start_symbols (Set[chr], optional): A set of characters representing the start symbols. Defaults to {"^", "v", "<", ">"}.
 
     Returns:
         Tuple[int, int, chr]: A tuple containing the row index, column index, and the start symbol found.
                               Returns (-1, -1, "") if no start symbol is found.
     """
-    for i in range(len(grid)):
-        j = [idx for idx in range(len(grid[i])) if grid[i][idx] in start_symbols]
-        if len(j) == 1:
-            j = j[0]
-            return i, j, grid[i][j]
+    for symbol in start_symbols:
+        pos = grid.find(symbol)
+        if pos is not None:
+            return pos[0], pos[1], symbol
     return -1, -1, ""
 
 
-def step(
-    grid: List[List[chr]],
-    curr_pos: Tuple[int, int, chr],
-    next_direction_map: Dict[chr, chr] = {"^": ">", ">": "v", "v": "<", "<": "^"},
-) -> Tuple[int, int, chr]:
-    """
-    Move a position in a grid based on the current direction and handle obstacles.
-
-    Args:
-        grid (List[List[chr]]): A 2D list representing the grid where each cell can be a character.
-        curr_pos (Tuple[int, int, chr]): A tuple containing the current x and y coordinates and the direction.
-        next_direction_map (Dict[chr, chr], optional): A dictionary mapping the current direction to the next direction
-            when an obstacle is encountered. Defaults to {"^": ">", ">": "v", "v": "<", "<": "^"}.
-
-    Returns:
-        Tuple[int, int, chr]: A tuple containing the new x and y coordinates and the new direction.
-    """
-
-    def _get_dx_dy(direction):
-        dx = 1 if direction == "v" else -1 if direction == "^" else 0
-        dy = 1 if direction == ">" else -1 if direction == "<" else 0
-        return dx, dy
-
-    x, y, direction = curr_pos
-    dx, dy = _get_dx_dy(direction)
-    height, width = len(grid), len(grid[0])
-
-    new_x, new_y = x + dx, y + dy
-
-    if not (0 <= new_x < height and 0 <= new_y < width):
-        return new_x, new_y, ""
-
-    if grid[new_x][new_y] == "#":
-        direction = next_direction_map[direction]
-
-        dx, dy = _get_dx_dy(direction=direction)
-        new_x, new_y = x + dx, y + dy
-
-    return new_x, new_y, direction
-
-
 def count_visited_positions(
-    grid: List[List[chr]], start_pos: Tuple[int, int, chr]
+    grid: Grid, start_pos: Tuple[int, int, chr], loop_method: str = "bitset"
 ) -> Tuple[int, Set[Tuple[int, int]]]:
 
-    visited = []
-    distinct_positions = set()
-    x, y, direction = start_pos
+    if not start_pos[2]:
+        # no guard on the map
+        return 0, set()
+
+    width = grid.width
+    detector = LoopDetector(loop_method, size=state_count(grid))
+    distinct_cells = set()
+    state = encode_state(*start_pos, width)
 
-    while direction:
-        visited.append((x, y, direction))
-        distinct_positions.add((x, y))
-        x, y, direction = step(grid=grid, curr_pos=(x, y, direction))
-        is_loop, loop_seq, loop_len = detect_in_loop(visited)
-        if is_loop:
+    while state != EXITED:
+        distinct_cells.add(state >> 2)
+        if detector.push(state):
             break
+        state = step(grid, state)
 
+    distinct_positions = {divmod(cell, width) for cell in distinct_cells}
     return len(distinct_positions), distinct_positions
 
 
-def detect_in_loop(
-    coords_sequence: Sequence[Tuple[int, int, chr]]
-) -> Tuple[bool, Optional[List[Tuple[int, int]]], int]:
-    """
-    Detect if sequence contains a loop and return loop information.
-
-    Returns:
-        Tuple containing:
-        - bool: Whether loop was detected
-        - List: Loop sequence if found, None otherwise
-        - int: Length of the loop (0 if no loop)
-    """
-    position_history: Dict[Tuple[int, int, chr], int] = {}
-
-    for i, pos in enumerate(coords_sequence):
-        if pos in position_history:
-            # Loop found - calculate loop sequence
-            loop_start = position_history[pos]
-            loop_sequence = list(coords_sequence[loop_start:i])
-            return True, loop_sequence, len(loop_sequence)
-        position_history[pos] = i
-
-    return False, None, 0
-
-
-def place_obstacle(grid: List[List[chr]], pos: Tuple[int, int]) -> List[List[chr]]:
-    x, y = pos
-    if grid[x][y] == "#":
-        return grid
-    grid_copy = [[grid[i][j] for j in range(len(grid[i]))] for i in range(len(grid))]
-    grid_copy[x][y] = "#"
-    return grid_copy
-
-
 def obstacle_in_direction(
-    grid: List[List[chr]], curr_pos: Tuple[int, int, chr]
+    table: JumpTable,
+    state: int,
+    extra: Optional[Tuple[int, int]] = None,
 ) -> bool:
-    x, y, direction = curr_pos
-
-    if direction == "^":
-        return any(grid[i][y] == "#" for i in range(x - 1, -1, -1))
-    if direction == "v":
-        return any(grid[i][y] == "#" for i in range(x + 1, len(grid)))
-    if direction == "<":
-        return any(grid[x][j] == "#" for j in range(y - 1, -1, -1))
-    if direction == ">":
-        return any(grid[x][j] == "#" for j in range(y + 1, len(grid[0])))
-    return False
+    if state == EXITED:
+        return False
+    return table.next_turn(state, extra) != EXITED
 
 
 def simulate_obstacle_placements(
-    grid: List[List[chr]],
+    grid: Grid,
     start_pos: Tuple[int, int, chr],
     possible_obstacle_placements: Optional[Set[Tuple[int, int]]] = None,
+    verbose: bool = False,
+    loop_method: str = "bitset",
+    workers: int = 1,
 ) -> int:
 
-    start_direction = start_pos[2]
-    start_pos = (start_pos[0], start_pos[1])
+    if not start_pos[2]:
+        return 0, []
 
-    N = 0
+    width = grid.width
+    start_state = encode_state(*start_pos, width)
+    start_pos = (start_pos[0], start_pos[1])
 
     if not possible_obstacle_placements:
-        possible_obstacle_placements = [
-            (i, j)
-            for i in range(len(grid))
-            for j in range(len(grid[i]))
-            if grid[i][j] == "." and (i, j) != start_pos
-        ]
-
-    list_of_loop_seq = []
-    for idx, obstacle_placement in enumerate(possible_obstacle_placements):
-
-        traveled_coords = []
-        sim_grid = place_obstacle(grid, obstacle_placement)
-
-        direction = start_direction
-        x, y = start_pos
-
-        while direction:
-            traveled_coords.append((x, y, direction))
-            x, y, direction = step(grid=sim_grid, curr_pos=(x, y, direction))
-            # if there isn't an obstacle in the current direction, break
-            if not obstacle_in_direction(grid=sim_grid, curr_pos=(x, y, direction)):
-                break
-            # if we've visited this position in the past, check if we're in a loop
-            if (x, y, direction) in traveled_coords[:-1]:
-                is_loop, loop_seq, loop_len = detect_in_loop(traveled_coords)
-                if is_loop:
-                    list_of_loop_seq.append(
-                        {
-                            "obstacle_placement": obstacle_placement,
-                            "loop_sequence": loop_seq,
-                            "loop_length": loop_len,
-                        }
-                    )
+        possible_obstacle_placements = grid.iter_find(".")
+    # the guard's own cell is never a candidate
+    possible_obstacle_placements = [
+        pos for pos in possible_obstacle_placements if pos != start_pos
+    ]
+    n_placements = len(possible_obstacle_placements)
+
+    table = JumpTable(grid)
+    walk = Walk(grid, start_state)
+    # one visited buffer for every trial, cleared in O(1) between them
+    visited = StateSet(state_count(grid))
+
+    def trial(candidate):
+        idx, obstacle_placement = candidate
+        traveled_coords = LoopDetector(loop_method, visited=visited)
+        # the walk is unchanged until it first reaches the obstacle's cell
+        k = walk.resume_index(*obstacle_placement)
+        state = walk.states[k - 1]
+        # states since the resume, which brent does not keep a history of
+        resumed = []
+
+        # the obstacle is only in place for this trial
+        with grid.patched(obstacle_placement, "#") as sim_grid:
+            while True:
+                state = step(sim_grid, state)
+                # if there isn't an obstacle in the current direction, break
+                if not obstacle_in_direction(table, state, extra=obstacle_placement):
+                    return None
+
+                # if we've visited this state in the past, we're in a loop
+                prefix_index = walk.state_index[state]
+                if prefix_index < k:
+                    loop_seq = list(walk.states[prefix_index:k]) + resumed
+                    loop_len = len(loop_seq)
+                elif traveled_coords.push(state):
+                    is_loop, loop_seq, loop_len = traveled_coords.result()
+                else:
+                    resumed.append(state)
+                    continue
+
+                if verbose:
                     print(
-                        f"{idx+1}/{len(possible_obstacle_placements)} - Loop detected for obstacle placement {obstacle_placement}"
+                        f"{idx+1}/{n_placements} - Loop detected for obstacle placement {obstacle_placement}"
                     )
-                    N += 1
-                    break
+                return {
+                    "obstacle_placement": obstacle_placement,
+                    "loop_sequence": loop_seq
+                    and [decode_state(s, width) for s in loop_seq],
+                    "loop_length": loop_len,
+                }
+
+    return run_trials(
+        trial, list(enumerate(possible_obstacle_placements)), workers=workers
+    )
 
-    return N, list_of_loop_seq
+
+def part1(data):
+    data = Grid.from_view(data["grid"])
+    start_pos = locate_starting_pos(grid=data)
+    result, _ = count_visited_positions(grid=data, start_pos=start_pos)
+    return result
+
+
+def part2(data):
+    data = Grid.from_view(data["grid"])
+    start_pos = locate_starting_pos(grid=data)
+    _, path = count_visited_positions(grid=data, start_pos=start_pos)
+    result, _ = simulate_obstacle_placements(
+        grid=data, start_pos=start_pos, possible_obstacle_placements=path
+    )
+    return result
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--workers", type=int, default=1, help="processes for the obstacle trials"
+    )
+    args = parser.parse_args()
+
+    data = Grid.from_view(load_cached(input_data_path, parse)["grid"])
 
     x, y, direction = locate_starting_pos(grid=data)
     result, path = count_visited_positions(grid=data, start_pos=(x, y, direction))
     print("Number of distinct positions the guard will visit:", result)
 
     result, coords_lists = simulate_obstacle_placements(
-        grid=data, start_pos=(x, y, direction), possible_obstacle_placements=path
+        grid=data,
+        start_pos=(x, y, direction),
+        possible_obstacle_placements=path,
+        verbose=True,
+        workers=args.workers,
     )
     print("Number of potential obstacle positions:", result)
@@ -1,11 +1,27 @@
+import argparse
 import pathlib
-from typing import Dict, Generator, List, Optional, Sequence, Set, Tuple
+import sys
+from typing import Optional, Set, Tuple
 
 current_dir = pathlib.Path(__file__).parent.resolve()
 input_data_path = current_dir.joinpath("input.txt")
 
-with open(input_data_path, "r") as input_file:
-    data = input_file.readlines()
+sys.path.append(str(current_dir.parents[1]))
+from aoc.cache import load_cached  # noqa: E402
+from aoc.grid import Grid  # noqa: E402
+from jump_table import JumpTable  # noqa: E402
+from loops import LoopDetector  # noqa: E402
+from parallel import run_trials  # noqa: E402
+from turn_graph import TurnGraph  # noqa: E402
+from states import (  # noqa: E402
+    EXITED,
+    StateSet,
+    Walk,
+    encode_state,
+    state_count,
+    step,
+)
+
 _data = [
     "....#.....",
     ".........#",
@@ -31,171 +47,187 @@ _data = [
     "#..........",
     "........#..",
 ]
-data = [list(d.strip()) for d in data]
-
-
-next_direction_map = {"^": ">", ">": "v", "v": "<", "<": "^"}
-
-
-def get_next_turn_pos(grid, curr_pos):
-    x, y, d = curr_pos
-    if d == "^":
-        while x >= 1 and grid[x - 1][y] != "#":
-            x -= 1
-    if d == "v":
-        # walk in this dir until obstacle or oob
-        while x < len(grid) - 1 and grid[x + 1][y] != "#":
-            x += 1
-    if d == "<":
-        # walk in this dir until obstacle or oob
-        while y >= 1 and grid[x][y - 1] != "#":
-            y -= 1
-    if d == ">":
-        # walk in this dir until obstacle or oob
-        while y < len(grid[0]) - 1 and grid[x][y + 1] != "#":
-            y += 1
-    if (1 <= x < len(grid) - 1) and (1 <= y < len(grid[0]) - 1):
-        return x, y, next_direction_map[d]
-    return x, y, ""
-
-
-def detect_loop(grid, curr_pos):
-    x, y, d = curr_pos
-    turns = set()
-    while d:
-        x, y, d = get_next_turn_pos(grid, (x, y, d))
-        if (x, y, d) in turns:
+
+
+def parse(text):
+    return {"grid": Grid.from_lines([d.strip() for d in text.splitlines()]).view()}
+
+
+def get_next_turn_pos(table: JumpTable, state: int, extra=None) -> int:
+    # jump straight to the cell in front of the next obstacle, already turned
+    return table.next_turn(state, extra)
+
+
+def detect_loop(
+    table: JumpTable,
+    state: int,
+    extra=None,
+    loop_method="bitset",
+    visited=None,
+    walk: Optional[Walk] = None,
+    resume_index: int = 0,
+):
+    turns = LoopDetector(
+        loop_method, size=table.height * table.width * 4, visited=visited
+    )
+    while state != EXITED:
+        state = get_next_turn_pos(table, state, extra)
+        if state == EXITED:
+            break
+        # states of the walk before `resume_index` count as visited
+        if walk is not None and walk.state_index[state] < resume_index:
+            return True
+        if turns.push(state):
             return True
-        turns.add((x, y, d))
     return False
 
 
-def detect_loop_if_obstacle(grid, curr_pos, obstacle_pos):
-    x, y, d = curr_pos
-    reset_val = grid[obstacle_pos[0]][obstacle_pos[1]]
-    grid[obstacle_pos[0]][obstacle_pos[1]] = "#"
-    loop_detected = detect_loop(grid, curr_pos)
-    grid[obstacle_pos[0]][obstacle_pos[1]] = reset_val
-    return loop_detected
+def detect_loop_if_obstacle(
+    table: JumpTable, state: int, obstacle_pos, loop_method="bitset", visited=None
+):
+    return detect_loop(
+        table, state, extra=obstacle_pos, loop_method=loop_method, visited=visited
+    )
+
+
+ENGINES = ("walk", "graph", "batch")
+
+
+def count_loop_obstacles(
+    table: JumpTable,
+    walk: Walk,
+    candidates,
+    loop_method="bitset",
+    workers: int = 1,
+    engine: str = "walk",
+) -> int:
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}")
+    if engine == "batch":
+        # numpy instead of processes: every trial advances in lockstep
+        from lockstep import LockstepSimulator
+
+        loops = LockstepSimulator(table, walk).detect_loops(list(candidates))
+        return int(loops.sum())
+
+    graph = TurnGraph(table) if engine == "graph" else None
+    # shared by every trial run in this process, forked copies in the workers
+    visited = StateSet(table.height * table.width * 4)
+
+    def trial(obstacle_pos):
+        # the walk is unchanged until it first reaches the obstacle's cell
+        k = walk.resume_index(*obstacle_pos)
+        if graph is not None:
+            looped = graph.detect_loop(
+                walk.states[k - 1], obstacle_pos, visited, walk=walk, resume_index=k
+            )
+        else:
+            looped = detect_loop(
+                table,
+                walk.states[k - 1],
+                extra=obstacle_pos,
+                loop_method=loop_method,
+                visited=visited,
+                walk=walk,
+                resume_index=k,
+            )
+        return obstacle_pos if looped else None
+
+    N, _ = run_trials(trial, list(candidates), workers=workers)
+    return N
 
 
 def locate_starting_pos(
-    grid: List[List[chr]], start_symbols: Set[chr] = {"^", "v", "<", ">"}
+    grid: Grid, start_symbols: Set[chr] = {"^", "v", "<", ">"}
 ) -> Tuple[int, int, chr]:
     """
     Locate the starting position in a grid based on specified start symbols.
 
     Args:
-        grid (List[List[chr]]): A 2D list representing the grid.
+        grid (Grid): The map.
         start_symbols (Set[chr], optional): A set of characters representing the start symbols. Defaults to {"^", "v", "<", ">"}.
 
     Returns:
         Tuple[int, int, chr]: A tuple containing the row index, column index, and the start symbol found.
                               Returns (-1, -1, "") if no start symbol is found.
     """
-    for i in range(len(grid)):
-        j = [idx for idx in range(len(grid[i])) if grid[i][idx] in start_symbols]
-        if len(j) == 1:
-            j = j[0]
-            return i, j, grid[i][j]
+    for symbol in start_symbols:
+        pos = grid.find(symbol)
+        if pos is not None:
+            return pos[0], pos[1], symbol
     return -1, -1, ""
 
 
-def step(
-    grid: List[List[chr]],
-    curr_pos: Tuple[int, int, chr],
-    next_direction_map: Dict[chr, chr] = {"^": ">", ">": "v", "v": "<", "<": "^"},
-) -> Tuple[int, int, chr]:
-    """
-    Move a position in a grid based on the current direction and handle obstacles.
-
-    Args:
-        grid (List[List[chr]]): A 2D list representing the grid where each cell can be a character.
-        curr_pos (Tuple[int, int, chr]): A tuple containing the current x and y coordinates and the direction.
-        next_direction_map (Dict[chr, chr], optional): A dictionary mapping the current direction to the next direction
-            when an obstacle is encountered. Defaults to {"^": ">", ">": "v", "v": "<", "<": "^"}.
-
-    Returns:
-        Tuple[int, int, chr]: A tuple containing the new x and y coordinates and the new direction.
-    """
-
-    def _get_dx_dy(direction):
-        dx = 1 if direction == "v" else -1 if direction == "^" else 0
-        dy = 1 if direction == ">" else -1 if direction == "<" else 0
-        return dx, dy
-
-    x, y, direction = curr_pos
-    dx, dy = _get_dx_dy(direction)
-    height, width = len(grid), len(grid[0])
-
-    new_x, new_y = x + dx, y + dy
-
-    if not (0 <= new_x < height and 0 <= new_y < width):
-        return new_x, new_y, ""
-
-    if grid[new_x][new_y] == "#":
-        direction = next_direction_map[direction]
-
-        dx, dy = _get_dx_dy(direction=direction)
-        new_x, new_y = x + dx, y + dy
-
-    return new_x, new_y, direction
-
-
-def detect_in_loop(
-    coords_sequence: Sequence[Tuple[int, int, chr]]
-) -> Tuple[bool, Optional[List[Tuple[int, int]]], int]:
-    """
-    Detect if sequence contains a loop and return loop information.
+def count_visited_positions(
+    grid: Grid, start_pos: Tuple[int, int, chr], loop_method: str = "bitset"
+) -> Tuple[int, Set[Tuple[int, int]]]:
 
-    Returns:
-        Tuple containing:
-        - bool: Whether loop was detected
-        - List: Loop sequence if found, None otherwise
-        - int: Length of the loop (0 if no loop)
-    """
-    position_history: Dict[Tuple[int, int, chr], int] = {}
+    if not start_pos[2]:
+        # no guard on the map
+        return 0, set()
 
-    for i, pos in enumerate(coords_sequence):
-        if pos in position_history:
-            # Loop found - calculate loop sequence
-            loop_start = position_history[pos]
-            loop_sequence = list(coords_sequence[loop_start:i])
-            return True, loop_sequence, len(loop_sequence)
-        position_history[pos] = i
+    width = grid.width
+    detector = LoopDetector(loop_method, size=state_count(grid))
+    distinct_cells = set()
+    state = encode_state(*start_pos, width)
 
-    return False, None, 0
+    while state != EXITED:
+        distinct_cells.add(state >> 2)
+        if detector.push(state):
+            break
+        state = step(grid, state)
 
+    distinct_positions = {divmod(cell, width) for cell in distinct_cells}
+    return len(distinct_positions), distinct_positions
 
-def count_visited_positions(
-    grid: List[List[chr]], start_pos: Tuple[int, int, chr]
-) -> Tuple[int, Set[Tuple[int, int]]]:
 
-    visited = []
-    distinct_positions = set()
-    x, y, direction = start_pos
+def part1(data):
+    data = Grid.from_view(data["grid"])
+    start_pos = locate_starting_pos(grid=data)
+    result, _ = count_visited_positions(grid=data, start_pos=start_pos)
+    return result
 
-    while direction:
-        visited.append((x, y, direction))
-        distinct_positions.add((x, y))
-        x, y, direction = step(grid=grid, curr_pos=(x, y, direction))
-        is_loop, loop_seq, loop_len = detect_in_loop(visited)
-        if is_loop:
-            break
 
-    return len(distinct_positions), distinct_positions
+def part2(data):
+    data = Grid.from_view(data["grid"])
+    start_pos = locate_starting_pos(grid=data)
+    if not start_pos[2]:
+        return 0
+    walk = Walk(data, encode_state(*start_pos, data.width))
+    # the guard's own cell, visited first, is never a candidate
+    return count_loop_obstacles(JumpTable(data), walk, walk.positions()[1:])
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--workers", type=int, default=1, help="processes for the obstacle trials"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="walk",
+        help="jump through the obstacle index, follow the turn graph, or advance "
+        "all trials together with numpy (batch, ignores --workers)",
+    )
+    args = parser.parse_args()
+
+    data = Grid.from_view(load_cached(input_data_path, parse)["grid"])
 
     x, y, direction = locate_starting_pos(grid=data)
-    result, path = count_visited_positions(grid=data, start_pos=(x, y, direction))
+    result, _ = count_visited_positions(grid=data, start_pos=(x, y, direction))
     print("Number of distinct positions the guard will visit:", result)
 
     N = 0
-    for obstacle_pos in path:
-        if detect_loop_if_obstacle(data, (x, y, direction), obstacle_pos):
-            N += 1
+    if direction:
+        walk = Walk(data, encode_state(x, y, direction, data.width))
+        N = count_loop_obstacles(
+            JumpTable(data),
+            walk,
+            walk.positions()[1:],
+            workers=args.workers,
+            engine=args.engine,
+        )
 
     print("Number of obstacles that will cause the guard to loop:", N)
 
@@ -0,0 +1,78 @@
+"""
+Run independent obstacle trials on a process pool.
+
+The trial callable, together with the grid and jump table it closes over, is
+stored in a module global before the pool starts. Fork-started workers inherit
+it with the rest of the parent's memory, so the map is never pickled. Only
+chunks of candidates go to the workers, and only the loop records come back.
+"""
+
+import multiprocessing
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple
+
+# returns a loop record for a candidate that makes the guard loop, None otherwise
+Trial = Callable[[Any], Optional[Any]]
+
+_trial: Optional[Trial] = None
+
+
+def _run_chunk(chunk: Sequence[Any]) -> List[Any]:
+    records = []
+    for candidate in chunk:
+        record = _trial(candidate)
+        if record is not None:
+            records.append(record)
+    return records
+
+
+def _chunks(candidates: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    for i in range(0, len(candidates), size):
+        yield candidates[i : i + size]
+
+
+def can_fork() -> bool:
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def run_trials(
+    trial: Trial,
+    candidates: Sequence[Any],
+    workers: int = 1,
+    chunksize: Optional[int] = None,
+) -> Tuple[int, List[Any]]:
+    """
+    Run `trial` on every candidate and collect the loop records.
+
+    Args:
+        trial (Trial): Called with one candidate. It returns a record if the guard
+            loops and None otherwise.
+        candidates (Sequence[Any]): The candidates to try.
+        workers (int, optional): Number of worker processes. Falls back to running
+            in this process for 1 or when fork is unavailable. Defaults to 1.
+        chunksize (Optional[int], optional): Candidates per task. Defaults to about
+            eight tasks per worker.
+
+    Returns:
+        Tuple[int, List[Any]]: The number of looping candidates and their records,
+            in candidate order.
+    """
+    global _trial
+
+    candidates = list(candidates)
+    _trial = trial
+    try:
+        if workers <= 1 or len(candidates) < 2 or not can_fork():
+            records = _run_chunk(candidates)
+            return len(records), records
+
+        if chunksize is None:
+            chunksize = max(1, len(candidates) // (workers * 8))
+        records = []
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            for chunk_records in pool.imap(
+                _run_chunk, _chunks(candidates, chunksize)
+            ):
+                records.extend(chunk_records)
+        return len(records), records
+    finally:
+        _trial = None
@@ -0,0 +1,138 @@
+"""
+Integer encoding of guard states.
+
+A state (x, y, direction) is packed into the single int
+`(x * width + y) * 4 + direction_index`, so walks never allocate tuples and the
+set of visited states can live in a flat bytearray indexed by state.
+"""
+
+from array import array
+from typing import List, Tuple
+
+from aoc.grid import Grid
+
+# index + 1 (mod 4) is a right turn
+DIRECTIONS = "^>v<"
+DX = (-1, 0, 1, 0)
+DY = (0, 1, 0, -1)
+
+# returned instead of a state once the guard has walked off the map
+EXITED = -1
+
+OBSTACLE = ord("#")
+
+# index recorded for states and cells the walk never reaches
+UNSEEN = 2**63 - 1
+
+
+def encode_state(x: int, y: int, direction: str, width: int) -> int:
+    if len(direction) != 1 or direction not in DIRECTIONS:
+        raise ValueError(f"unknown direction {direction!r}")
+    return (x * width + y) * 4 + DIRECTIONS.index(direction)
+
+
+def decode_state(state: int, width: int) -> Tuple[int, int, str]:
+    cell, d = divmod(state, 4)
+    x, y = divmod(cell, width)
+    return x, y, DIRECTIONS[d]
+
+
+def state_count(grid: Grid) -> int:
+    return grid.height * grid.width * 4
+
+
+def step(grid: Grid, state: int) -> int:
+    """
+    Advance the guard by one move: turn right in place if the next cell is an
+    obstacle, otherwise step into it.
+
+    Returns:
+        int: The next state, or EXITED if the guard leaves the map.
+    """
+    cell, d = divmod(state, 4)
+    x, y = divmod(cell, grid.width)
+    new_x, new_y = x + DX[d], y + DY[d]
+    if not (0 <= new_x < grid.height and 0 <= new_y < grid.width):
+        return EXITED
+    if grid.data[new_x * grid.stride + new_y] == OBSTACLE:
+        return cell * 4 + (d + 1) % 4
+    return (new_x * grid.width + new_y) * 4 + d
+
+
+class StateSet:
+    """
+    Set of encoded states backed by one byte per possible state.
+
+    `clear` is O(1) amortized: a state is a member when its byte equals the
+    current generation, so clearing just bumps the generation, and the buffer
+    is only zeroed once every 255 clears. One instance can therefore be reused
+    across thousands of obstacle trials.
+    """
+
+    def __init__(self, size: int):
+        self._marks = bytearray(size)
+        self._generation = 1
+
+    def add(self, state: int) -> bool:
+        """
+        Add a state and return True if it was not already a member.
+        """
+        if self._marks[state] == self._generation:
+            return False
+        self._marks[state] = self._generation
+        return True
+
+    def __contains__(self, state: int) -> bool:
+        return self._marks[state] == self._generation
+
+    def clear(self):
+        self._generation += 1
+        if self._generation == 256:
+            # a fresh zeroed buffer is cheaper than overwriting the old one
+            self._marks = bytearray(len(self._marks))
+            self._generation = 1
+
+
+class Walk:
+    """
+    The guard's walk on the unmodified map, recorded once for all obstacle trials.
+
+    `states[i]` is the i-th state, `state_index[s]` the index at which state s is
+    reached and `first_visit[cell]` the index of the first state on each cell,
+    UNSEEN where never reached. Up to the first time it enters the obstacle's
+    cell, a trial walk is identical to this one, so a trial can resume from
+    `states[k - 1]`, k being the obstacle cell's first visit, and treat every
+    state with `state_index < k` as already visited without copying the prefix.
+    """
+
+    def __init__(self, grid: Grid, start_state: int):
+        self.width = grid.width
+        self.states = array("q")
+        self.state_index = array("q", [UNSEEN]) * state_count(grid)
+        self.first_visit = array("q", [UNSEEN]) * (grid.height * grid.width)
+        # visited cells in first-visit order, the start cell first
+        self.cells = array("q")
+
+        state = start_state
+        while state != EXITED and self.state_index[state] == UNSEEN:
+            i = len(self.states)
+            self.state_index[state] = i
+            self.states.append(state)
+            cell = state >> 2
+            if self.first_visit[cell] == UNSEEN:
+                self.first_visit[cell] = i
+                self.cells.append(cell)
+            state = step(grid, state)
+        self.loops = state != EXITED
+
+    def resume_index(self, x: int, y: int) -> int:
+        """
+        Index of the first state on (x, y), or the walk's length if it is never
+        reached. A trial with an obstacle there resumes from the state before.
+        The start cell (index 0) is not a valid obstacle position.
+        """
+        k = self.first_visit[x * self.width + y]
+        return len(self.states) if k == UNSEEN else k
+
+    def positions(self) -> List[Tuple[int, int]]:
+        return [divmod(cell, self.width) for cell in self.cells]
@@ -0,0 +1,64 @@
+import pathlib
+import random
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+from loops import METHODS, LoopDetector, detect_in_loop  # noqa: E402
+
+
+def iterate(seed: int):
+    """
+    Follow a random function from a random start until the first repeat.
+
+    Returns the states before the repeat, the loop start and the loop length.
+    """
+    rng = random.Random(seed)
+    n = rng.randrange(1, 200)
+    f = [rng.randrange(n) for _ in range(n)]
+    state = rng.randrange(n)
+    first_seen = {}
+    states = []
+    while state not in first_seen:
+        first_seen[state] = len(states)
+        states.append(state)
+        state = f[state]
+    loop_start = first_seen[state]
+    return states, loop_start, len(states) - loop_start
+
+
+def test_methods_agree_on_sequences_cut_after_the_first_repeat():
+    for seed in range(3000):
+        states, loop_start, loop_length = iterate(seed)
+        for extra in range(4):
+            sequence = states + [
+                states[loop_start + k % loop_length] for k in range(extra + 1)
+            ]
+            expected = (
+                True,
+                states[loop_start : loop_start + loop_length],
+                loop_length,
+            )
+            for method in METHODS:
+                assert detect_in_loop(sequence, method) == expected, (seed, method)
+
+
+def test_methods_agree_without_a_repeat():
+    states, _, _ = iterate(0)
+    for method in METHODS:
+        assert detect_in_loop(states, method) == (False, None, 0)
+
+
+def test_streaming_brent_bound():
+    for seed in range(3000):
+        states, loop_start, loop_length = iterate(seed)
+        detector = LoopDetector("brent")
+        pushed = 0
+        while not detector.push(
+            states[loop_start + (pushed - loop_start) % loop_length]
+            if pushed >= loop_start
+            else states[pushed]
+        ):
+            assert detector.result() == (False, None, 0)
+            pushed += 1
+        assert detector.result() == (True, None, loop_length)
+        assert pushed <= 2 * max(loop_start + 1, loop_length) + loop_length
@@ -0,0 +1,67 @@
+import pathlib
+import random
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+from aoc.grid import Grid  # noqa: E402
+from main import (  # noqa: E402
+    count_visited_positions,
+    locate_starting_pos,
+    simulate_obstacle_placements,
+)
+from states import EXITED, decode_state, encode_state, step  # noqa: E402
+
+
+def random_map(seed: int) -> Grid:
+    rng = random.Random(seed)
+    height, width = rng.randrange(3, 14), rng.randrange(3, 14)
+    rows = [
+        ["#" if rng.random() < 0.15 else "." for _ in range(width)]
+        for _ in range(height)
+    ]
+    rows[rng.randrange(height)][rng.randrange(width)] = rng.choice("^>v<")
+    return Grid.from_lines(["".join(row) for row in rows])
+
+
+def loop_with_obstacle(grid: Grid, start_pos, obstacle):
+    """
+    Walk the whole map with the obstacle and return the loop's states, or None.
+    """
+    with grid.patched(obstacle, "#") as sim_grid:
+        state = encode_state(*start_pos, grid.width)
+        first_seen = {}
+        states = []
+        while state != EXITED:
+            if state in first_seen:
+                return states[first_seen[state] :]
+            first_seen[state] = len(states)
+            states.append(state)
+            state = step(sim_grid, state)
+    return None
+
+
+def test_loop_records_match_a_full_walk():
+    for seed in range(100):
+        grid = random_map(seed)
+        start_pos = locate_starting_pos(grid)
+        _, path = count_visited_positions(grid, start_pos)
+        candidates = path - {start_pos[:2]}
+        expected = {}
+        for obstacle in candidates:
+            loop = loop_with_obstacle(grid, start_pos, obstacle)
+            if loop is not None:
+                expected[obstacle] = [decode_state(s, grid.width) for s in loop]
+
+        for method in ("hash", "brent", "bitset"):
+            count, records = simulate_obstacle_placements(
+                grid, start_pos, candidates, loop_method=method
+            )
+            assert count == len(expected), (seed, method)
+            for record in records:
+                loop = expected[record["obstacle_placement"]]
+                assert record["loop_length"] == len(loop), (seed, method)
+                sequence = record["loop_sequence"]
+                if sequence is not None:
+                    # the trial may enter the loop at a different state
+                    i = loop.index(sequence[0])
+                    assert sequence == loop[i:] + loop[:i], (seed, method)
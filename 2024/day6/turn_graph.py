@@ -0,0 +1,118 @@
+"""
+The guard's motion as a functional graph over turn states.
+
+A turn state is an encoded state standing in front of an obstacle, already
+facing the direction the guard turns to. From each one, the guard moves
+straight to the next turn state or off the map, so every node has exactly one
+successor. The graph is built once. A candidate obstacle changes only the
+edges whose straight segment crosses its cell, plus the (at most four) new
+turn states in front of it. `patch` returns those edges as a small overlay,
+so a trial costs one dict lookup per turn.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from jump_table import JumpTable
+from states import DIRECTIONS, DX, DY, EXITED, StateSet, Walk
+
+# (first cell, last cell, source state) of a segment along a row or column,
+# not counting the cell the guard starts from
+Segment = Tuple[int, int, int]
+
+
+class TurnGraph:
+    def __init__(self, table: JumpTable):
+        self.table = table
+        self.height, self.width = table.height, table.width
+        self.successor: Dict[int, int] = {}
+        # successors of turn states that only exist next to a candidate obstacle
+        self._spare: Dict[int, int] = {}
+        self._row_segments: List[List[Segment]] = [[] for _ in range(self.height)]
+        self._col_segments: List[List[Segment]] = [[] for _ in range(self.width)]
+
+        obstacles = {(r, c) for r, row in enumerate(table.rows) for c in row}
+        for r, c in obstacles:
+            for d in range(4):
+                x, y = r - DX[d], c - DY[d]
+                if 0 <= x < self.height and 0 <= y < self.width:
+                    if (x, y) not in obstacles:
+                        self._add_node((x * self.width + y) * 4 + (d + 1) % 4)
+
+    def _add_node(self, state: int):
+        cell, d = divmod(state, 4)
+        x, y = divmod(cell, self.width)
+        stop_x, stop_y, blocked = self.table.next_stop(x, y, DIRECTIONS[d])
+        if blocked:
+            self.successor[state] = (stop_x * self.width + stop_y) * 4 + (d + 1) % 4
+        else:
+            self.successor[state] = EXITED
+
+        if DIRECTIONS[d] == "^" and stop_x < x:
+            self._col_segments[y].append((stop_x, x - 1, state))
+        elif DIRECTIONS[d] == "v" and stop_x > x:
+            self._col_segments[y].append((x + 1, stop_x, state))
+        elif DIRECTIONS[d] == "<" and stop_y < y:
+            self._row_segments[x].append((stop_y, y - 1, state))
+        elif DIRECTIONS[d] == ">" and stop_y > y:
+            self._row_segments[x].append((y + 1, stop_y, state))
+
+    def patch(self, obstacle: Tuple[int, int]) -> Dict[int, int]:
+        """
+        Return the edges that differ from the base graph once `obstacle` is added.
+        """
+        p_x, p_y = obstacle
+        overlay = {}
+
+        # segments through the obstacle now stop in front of it
+        for lo, hi, state in self._col_segments[p_y]:
+            if lo <= p_x <= hi:
+                d = state % 4
+                in_front = ((p_x - DX[d]) * self.width + p_y) * 4
+                overlay[state] = in_front + (d + 1) % 4
+        for lo, hi, state in self._row_segments[p_x]:
+            if lo <= p_y <= hi:
+                d = state % 4
+                in_front = (p_x * self.width + p_y - DY[d]) * 4
+                overlay[state] = in_front + (d + 1) % 4
+
+        # and the obstacle brings its own turn states; they move away from it, so
+        # their successors do not depend on it and none of them was patched above
+        for d in range(4):
+            x, y = p_x - DX[d], p_y - DY[d]
+            if 0 <= x < self.height and 0 <= y < self.width:
+                state = (x * self.width + y) * 4 + (d + 1) % 4
+                if state in self.successor:
+                    continue
+                next_state = self._spare.get(state)
+                if next_state is None:
+                    next_state = self._spare[state] = self.table.next_turn(state)
+                overlay[state] = next_state
+        return overlay
+
+    def detect_loop(
+        self,
+        state: int,
+        obstacle: Tuple[int, int],
+        visited: StateSet,
+        walk: Optional[Walk] = None,
+        resume_index: int = 0,
+    ) -> bool:
+        """
+        Follow the patched graph from an arbitrary state until it exits or repeats.
+
+        States of `walk` before `resume_index` count as already visited, as in
+        main2.detect_loop.
+        """
+        overlay = self.patch(obstacle)
+        successor = self.successor
+        visited.clear()
+
+        state = self.table.next_turn(state, obstacle)
+        while state != EXITED:
+            if walk is not None and walk.state_index[state] < resume_index:
+                return True
+            if not visited.add(state):
+                return True
+            next_state = overlay.get(state)
+            state = successor[state] if next_state is None else next_state
+        return False
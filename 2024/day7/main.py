@@ -3,9 +3,6 @@ import pathlib
 current_dir = pathlib.Path(__file__).parent.resolve()
 input_data_path = current_dir.joinpath("input.txt")
 
-with open(input_data_path, "r") as input_file:
-    data = input_file.readlines()
-
 _data = [
     "190: 10 19",
     "3267: 81 40 27",
@@ -18,14 +15,16 @@ _data = [
     "292: 11 6 16 20",
 ]
 
-data = [d.strip() for d in data]
-
 
 def parse_rule(rule):
     rule = rule.split(": ")
     return int(rule[0]), [int(r) for r in rule[1].split(" ")]
 
 
+def parse(text):
+    return [parse_rule(d.strip()) for d in text.splitlines()]
+
+
 def rule_possibly_true(true_result, current_value, args, arg_i):
     if arg_i == len(args):
         return current_value == true_result
@@ -55,16 +54,23 @@ def solve_rule(rule, rule_func=rule_possibly_true):
     return 0
 
 
-S = 0
-for rule in data:
-    rule = parse_rule(rule)
-    S += solve_rule(rule)
+def part1(data):
+    S = 0
+    for rule in data:
+        S += solve_rule(rule)
+    return S
+
+
+def part2(data):
+    S = 0
+    for rule in data:
+        S += solve_rule(rule, rule_possibly_true2)
+    return S
 
-print(S)
 
-S = 0
-for rule in data:
-    rule = parse_rule(rule)
-    S += solve_rule(rule, rule_possibly_true2)
+if __name__ == "__main__":
+    with open(input_data_path, "r") as input_file:
+        data = parse(input_file.read())
 
-print(S)
+    print(part1(data))
+    print(part2(data))
@@ -1,11 +1,17 @@
 import pathlib
+import sys
 from typing import Dict, List, Set, Tuple
 
 current_dir = pathlib.Path(__file__).parent.resolve()
 input_data_path = current_dir.joinpath("input.txt")
 
-with open(input_data_path, "r") as input_file:
-    data = input_file.readlines()
+sys.path.append(str(current_dir.parents[1]))
+from aoc.cache import load_cached  # noqa: E402
+from aoc.grid import Grid  # noqa: E402
+
+
+def parse(text):
+    return {"grid": Grid.from_lines([r.strip() for r in text.splitlines()]).view()}
 
 
 def setup_test_cases_pt1():
@@ -97,8 +103,8 @@ def setup_test_cases_pt1():
 
     _test_cases = []
     for data, result in test_cases:
-        _data = [list(r) for r in data]
-        _result = [list(r) for r in result]
+        _data = Grid.from_lines(data)
+        _result = Grid.from_lines(result)
         _test_cases.append((_data, _result))
     test_cases = _test_cases
 
@@ -168,22 +174,21 @@ def setup_test_cases_pt2():
 
     _test_cases = []
     for data, result in test_cases:
-        _data = [list(r) for r in data]
-        _result = [list(r) for r in result]
+        _data = Grid.from_lines(data)
+        _result = Grid.from_lines(result)
         _test_cases.append((_data, _result))
     test_cases = _test_cases
 
     return test_cases
 
 
-def _get_antenna_positions(data) -> Dict[chr, Set[Tuple[int, int]]]:
+def _get_antenna_positions(data: Grid) -> Dict[chr, Set[Tuple[int, int]]]:
     antenna_positions = {}
-    for i, row in enumerate(data):
-        for j, cell in enumerate(row):
-            if cell.isalnum():
-                if cell not in antenna_positions:
-                    antenna_positions[cell] = set()
-                antenna_positions[cell].add((i, j))
+    for cell in set(data.data.tobytes()):
+        if chr(cell).isalnum():
+            positions = set(data.iter_find(cell))
+            if positions:
+                antenna_positions[chr(cell)] = positions
     return antenna_positions
 
 
@@ -246,25 +251,44 @@ def _filter_antinode_positions_within_map(
     return filtered_antinode_positions
 
 
-def get_antinode_positions_within_map(data, harmonics: int = 0):
+def get_antinode_positions_within_map(data: Grid, harmonics: int = 0):
     antenna_positions = _get_antenna_positions(data)
     antenna_position_pairs = _get_antenna_pairs(antenna_positions)
     antinode_positions = _get_antinode_positions(antenna_position_pairs, harmonics)
-    max_x, max_y = len(data), len(data[0])
+    max_x, max_y = data.height, data.width
     antinode_positions = _filter_antinode_positions_within_map(
         antinode_positions, max_x, max_y
     )
     return antinode_positions
 
 
-def _convert_antinode_positions_to_map(antinode_positions, data):
+def _convert_antinode_positions_to_map(antinode_positions, data: Grid):
     for antenna, antinodes in antinode_positions.items():
         for antinode in antinodes:
-            if data[antinode[0]][antinode[1]] == ".":
-                data[antinode[0]][antinode[1]] = "#"
+            if data[antinode] == ".":
+                data[antinode] = "#"
     return data
 
 
+def count_unique_antinodes(data: Grid, harmonics: int = 0) -> int:
+    antinode_positions = get_antinode_positions_within_map(data, harmonics)
+
+    antinode_set = set()
+    for antinodes in antinode_positions.values():
+        antinode_set.update(antinodes)
+    return len(antinode_set)
+
+
+def part1(data):
+    data = Grid.from_view(data["grid"])
+    return count_unique_antinodes(data)
+
+
+def part2(data):
+    data = Grid.from_view(data["grid"])
+    return count_unique_antinodes(data, harmonics=data.height + data.width)
+
+
 def run_tests(test_cases, harmonics=0):
     print("Running tests")
     for data, solution in test_cases:
@@ -273,12 +297,12 @@ def run_tests(test_cases, harmonics=0):
         success = True
         print(
             "solution",
-            " " * (len(solution[0]) // 2 + (len(solution[0]) - len("solution"))),
+            " " * (solution.width // 2 + (solution.width - len("solution"))),
             "result",
         )
-        for row1, row2 in zip(solution, result):
+        for row1, row2 in zip(solution.lines(), result.lines()):
             success = success and (row1 == row2)
-            print("".join(row1), " " * (len(row1) // 2), "".join(row2))
+            print(row1, " " * (len(row1) // 2), row2)
         print(success)
         print()
 
@@ -287,26 +311,14 @@ if __name__ == "__main__":
     test_cases = setup_test_cases_pt1()
     run_tests(test_cases)
 
-    data = [list(r.strip()) for r in data]
-
-    antinode_positions = get_antinode_positions_within_map(data)
+    data = load_cached(input_data_path, parse)
 
-    antinode_set = set()
-    for antinodes in antinode_positions.values():
-        antinode_set.update(antinodes)
-    print(f"Total unique antinodes: {len(antinode_set)}")
+    print(f"Total unique antinodes: {part1(data)}")
     print()
 
     test_cases = setup_test_cases_pt2()
-    harmonics = max(map(lambda x: len(x[0]) + len(x[0][0]), test_cases))
+    harmonics = max(map(lambda x: x[0].height + x[0].width, test_cases))
     run_tests(test_cases, harmonics=harmonics)
 
-    antinode_positions = get_antinode_positions_within_map(
-        data, harmonics=len(data) + len(data[0])
-    )
-
-    antinode_set = set()
-    for antinodes in antinode_positions.values():
-        antinode_set.update(antinodes)
-    print(f"Total unique antinodes with harmonics: {len(antinode_set)}")
+    print(f"Total unique antinodes with harmonics: {part2(data)}")
     print()
@@ -0,0 +1 @@
+"""Shared helpers for running and timing the Advent of Code solutions."""
@@ -0,0 +1,244 @@
+"""
+Binary cache for parsed puzzle inputs.
+
+A day's `parse` returns a dict of named columns (`array.array`, `bytes`,
+`bytearray` or `memoryview`, optionally multi-dimensional). The first run
+writes those columns to `.<input name>.<tag>.cache` next to the input. The tag
+is `<year>-<day>-<module>` of the parser, so days sharing an input never read
+each other's columns. The header holds the SHA-256 of the raw input file and a
+fingerprint of the parser's source file and of the shared helpers parsers
+build their columns with (`aoc/grid.py`). Later runs memory-map the cache and
+hand back `memoryview`s over the mapping without copying or re-parsing.
+Editing the input, the parser's module or those helpers changes the header,
+which turns the next load into a miss.
+"""
+
+import hashlib
+import inspect
+import json
+import mmap
+import os
+import pathlib
+import struct
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+MAGIC = b"AOCCACHE"
+FORMAT_VERSION = 2
+
+# magic, version, input sha256, parser fingerprint, manifest length
+_header = struct.Struct("<8sI32s32sI")
+_alignment = 8
+
+# helpers whose output layout ends up in the cached columns of several days
+_shared_sources = (pathlib.Path(__file__).resolve().with_name("grid.py"),)
+
+
+class UncacheableError(TypeError):
+    """Raised when a parse function's output cannot be stored as columns."""
+
+
+def cache_path(input_path: pathlib.Path, tag: str) -> pathlib.Path:
+    return input_path.with_name(f".{input_path.name}.{tag}.cache")
+
+
+def _source_file(parse: Callable) -> Optional[pathlib.Path]:
+    try:
+        source = inspect.getsourcefile(parse)
+    except TypeError:
+        return None
+    return pathlib.Path(source).resolve() if source else None
+
+
+def parser_tag(parse: Callable) -> str:
+    """
+    Name a parser's cache by where it is defined, e.g. "2024-day2-main" for
+    2024/day2/main.py.
+    """
+    source = _source_file(parse)
+    if source is None:
+        return parse.__module__
+    return f"{source.parent.parent.name}-{source.parent.name}-{source.stem}"
+
+
+def parser_fingerprint(parse: Callable) -> bytes:
+    """
+    SHA-256 of the module that defines `parse` and of the shared helpers, so
+    that editing the parser, the helpers next to it or e.g. the `Grid.view`
+    layout invalidates its caches. Falls back to the function's bytecode when
+    the source is not available.
+    """
+    digest = hashlib.sha256(f"{parse.__module__}.{parse.__qualname__}".encode())
+    source = _source_file(parse)
+    if source is not None and source.exists():
+        digest.update(source.read_bytes())
+    else:
+        digest.update(parse.__code__.co_code)
+    for shared in _shared_sources:
+        digest.update(shared.read_bytes())
+    return digest.digest()
+
+
+def file_digest(input_path: pathlib.Path, chunk_size: int = 1 << 20) -> bytes:
+    digest = hashlib.sha256()
+    with open(input_path, "rb") as input_file:
+        while chunk := input_file.read(chunk_size):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def _align(offset: int) -> int:
+    return (offset + _alignment - 1) // _alignment * _alignment
+
+
+def _as_columns(parsed: Any) -> Dict[str, memoryview]:
+    if not isinstance(parsed, dict):
+        raise UncacheableError(
+            f"parse output must be a dict of columns, got {type(parsed).__name__}"
+        )
+    columns = {}
+    for name, column in parsed.items():
+        try:
+            view = memoryview(column)
+        except TypeError:
+            raise UncacheableError(
+                f"column {name!r} of type {type(column).__name__} is not a buffer"
+            ) from None
+        if not view.c_contiguous:
+            view = memoryview(view.tobytes()).cast(view.format, view.shape)
+        columns[name] = view
+    return columns
+
+
+def _cast(view: memoryview, fmt: str, shape: Sequence[int]) -> memoryview:
+    # memoryview refuses to cast to a shape containing zeros
+    if view.nbytes == 0:
+        return view.cast(fmt)
+    return view.cast(fmt, shape)
+
+
+def write_cache(
+    path: pathlib.Path,
+    digest: bytes,
+    columns: Dict[str, memoryview],
+    fingerprint: bytes,
+) -> None:
+    """
+    Write columns to `path` atomically, tagged with the input's digest and the
+    parser's fingerprint.
+    """
+    manifest: List[Dict[str, Any]] = []
+    offset = 0
+    for name, view in columns.items():
+        offset = _align(offset)
+        manifest.append(
+            {
+                "name": name,
+                "format": view.format,
+                "shape": list(view.shape),
+                "offset": offset,
+                "nbytes": view.nbytes,
+            }
+        )
+        offset += view.nbytes
+
+    manifest_bytes = json.dumps(manifest).encode()
+    header = _header.pack(
+        MAGIC, FORMAT_VERSION, digest, fingerprint, len(manifest_bytes)
+    )
+    data_start = _align(len(header) + len(manifest_bytes))
+
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as cache_file:
+        cache_file.write(header)
+        cache_file.write(manifest_bytes)
+        for entry, view in zip(manifest, columns.values()):
+            cache_file.seek(data_start + entry["offset"])
+            cache_file.write(view.cast("B"))
+        cache_file.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+def read_cache(
+    path: pathlib.Path, digest: bytes, fingerprint: bytes
+) -> Optional[Dict[str, memoryview]]:
+    """
+    Memory-map a cache file and return views over its columns.
+
+    The mapping is copy-on-write, so callers may mutate the returned views
+    without touching the file.
+
+    Returns:
+        Optional[Dict[str, memoryview]]: The columns, or None if the cache is
+            missing, corrupt, from another format version, for other input or
+            written by another parser.
+    """
+    try:
+        with open(path, "rb") as cache_file:
+            mapping = mmap.mmap(cache_file.fileno(), 0, access=mmap.ACCESS_COPY)
+    except (OSError, ValueError):
+        return None
+
+    if len(mapping) < _header.size:
+        return None
+    magic, version, cached_digest, cached_fingerprint, manifest_length = (
+        _header.unpack_from(mapping)
+    )
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return None
+    if cached_digest != digest or cached_fingerprint != fingerprint:
+        return None
+
+    manifest_end = _header.size + manifest_length
+    try:
+        manifest = json.loads(mapping[_header.size : manifest_end])
+    except ValueError:
+        return None
+
+    data = memoryview(mapping)[_align(manifest_end) :]
+    columns = {}
+    for entry in manifest:
+        start, nbytes = entry["offset"], entry["nbytes"]
+        if start + nbytes > len(data):
+            return None
+        columns[entry["name"]] = _cast(
+            data[start : start + nbytes], entry["format"], entry["shape"]
+        )
+    return columns
+
+
+def load_cached(
+    input_path: pathlib.Path,
+    parse: Callable[[str], Dict[str, Any]],
+    tag: Optional[str] = None,
+) -> Dict[str, memoryview]:
+    """
+    Load parsed columns for `input_path`, parsing and caching them on a miss.
+
+    Args:
+        input_path (pathlib.Path): The raw puzzle input.
+        parse (Callable[[str], Dict[str, Any]]): Turns the input text into a dict of columns.
+        tag (Optional[str], optional): Names the cache file. Defaults to `parser_tag(parse)`.
+
+    Returns:
+        Dict[str, memoryview]: The parsed columns, keyed by name.
+
+    Raises:
+        UncacheableError: If `parse` does not return a dict of buffers.
+    """
+    input_path = pathlib.Path(input_path)
+    path = cache_path(input_path, tag if tag is not None else parser_tag(parse))
+    digest = file_digest(input_path)
+    fingerprint = parser_fingerprint(parse)
+
+    # a cache of another input or another parser is a miss, not an answer
+    columns = read_cache(path, digest, fingerprint)
+    if columns is not None:
+        return columns
+
+    columns = _as_columns(parse(input_path.read_text()))
+    try:
+        write_cache(path, digest, columns, fingerprint)
+    except OSError:
+        # a read-only input directory only costs us the speedup
+        pass
+    return columns
@@ -0,0 +1,210 @@
+"""
+Compact character grid shared by the grid puzzles.
+
+Cells are single bytes stored row-major in one flat buffer with a row stride,
+so a 2000x2000 map costs 4 MB instead of a list of lists of 1-character
+strings. Rows, columns and diagonals are exposed as zero-copy `memoryview`s.
+"""
+
+import re
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+Cell = Union[str, int]
+
+
+def _byte(value: Cell) -> int:
+    return ord(value) if isinstance(value, str) else value
+
+
+class Grid:
+    """
+    A `height` x `width` grid of byte cells backed by a flat buffer.
+
+    Cell (r, c) lives at offset `r * stride + c`. Single cells read and write
+    as 1-character strings; `set` additionally records the old value so that
+    a batch of edits can be rolled back with `undo`.
+    """
+
+    def __init__(
+        self,
+        buffer,
+        width: int,
+        height: Optional[int] = None,
+        stride: Optional[int] = None,
+    ):
+        self.data = memoryview(buffer).cast("B")
+        self.width = width
+        self.stride = stride if stride is not None else width
+        if height is None:
+            height = len(self.data) // self.stride if self.stride else 0
+        self.height = height
+        self._journal: List[Tuple[int, int]] = []
+
+    @classmethod
+    def from_lines(cls, lines: Sequence[str]) -> "Grid":
+        width = len(lines[0]) if lines else 0
+        if any(len(line) != width for line in lines):
+            raise ValueError("grid rows must all have the same length")
+        return cls(bytearray("".join(lines).encode()), width, len(lines))
+
+    @classmethod
+    def from_text(cls, text: str) -> "Grid":
+        return cls.from_lines(
+            [line.strip() for line in text.splitlines() if line.strip()]
+        )
+
+    @classmethod
+    def from_view(cls, view: memoryview) -> "Grid":
+        """
+        Wrap a (height, width) byte view, e.g. a cached column, without copying.
+        """
+        if view.ndim != 2:
+            return cls(view, 0, 0)
+        height, width = view.shape
+        return cls(view, width, height)
+
+    def view(self) -> memoryview:
+        """
+        Return the cells as a (height, width) view, e.g. to store in the parse cache.
+        """
+        if self.stride != self.width:
+            return memoryview(self.copy().data).cast("B", self.shape)
+        if not self.height or not self.width:
+            return self.data[: self.height * self.width]
+        return self.data[: self.height * self.width].cast("B", self.shape)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.height, self.width
+
+    def index(self, r: int, c: int) -> int:
+        return r * self.stride + c
+
+    def position(self, index: int) -> Tuple[int, int]:
+        return divmod(index, self.stride)
+
+    def in_bounds(self, r: int, c: int) -> bool:
+        return 0 <= r < self.height and 0 <= c < self.width
+
+    def __getitem__(self, pos: Tuple[int, int]) -> str:
+        r, c = pos
+        return chr(self.data[r * self.stride + c])
+
+    def __setitem__(self, pos: Tuple[int, int], value: Cell):
+        r, c = pos
+        self.data[r * self.stride + c] = _byte(value)
+
+    def row(self, r: int) -> memoryview:
+        start = r * self.stride
+        return self.data[start : start + self.width]
+
+    def col(self, c: int) -> memoryview:
+        return self.data[c : c + (self.height - 1) * self.stride + 1 : self.stride]
+
+    def diagonal(self, r: int, c: int) -> memoryview:
+        """
+        View of the cells from (r, c) going down and to the right.
+        """
+        n = min(self.height - r, self.width - c)
+        start, step = self.index(r, c), self.stride + 1
+        return self.data[start : start + (n - 1) * step + 1 : step]
+
+    def anti_diagonal(self, r: int, c: int) -> memoryview:
+        """
+        View of the cells from (r, c) going down and to the left.
+        """
+        n = min(self.height - r, c + 1)
+        start, step = self.index(r, c), self.stride - 1
+        if n == 1 or step == 0:
+            return self.data[start : start + 1]
+        return self.data[start : start + (n - 1) * step + 1 : step]
+
+    def diagonals(self) -> Iterator[Tuple[int, int, memoryview]]:
+        """
+        Yield (r, c, view) for every down-right diagonal, keyed by its top cell.
+        """
+        for c in range(self.width - 1, -1, -1):
+            yield 0, c, self.diagonal(0, c)
+        for r in range(1, self.height):
+            yield r, 0, self.diagonal(r, 0)
+
+    def anti_diagonals(self) -> Iterator[Tuple[int, int, memoryview]]:
+        """
+        Yield (r, c, view) for every down-left diagonal, keyed by its top cell.
+        """
+        for c in range(self.width):
+            yield 0, c, self.anti_diagonal(0, c)
+        for r in range(1, self.height):
+            yield r, self.width - 1, self.anti_diagonal(r, self.width - 1)
+
+    def set(self, r: int, c: int, value: Cell):
+        """
+        Overwrite a cell, remembering its old value for `undo`.
+        """
+        i = r * self.stride + c
+        self._journal.append((i, self.data[i]))
+        self.data[i] = _byte(value)
+
+    def checkpoint(self) -> int:
+        return len(self._journal)
+
+    def undo(self, checkpoint: int = 0):
+        """
+        Roll back every `set` made after `checkpoint`, newest first.
+        """
+        journal, data = self._journal, self.data
+        while len(journal) > checkpoint:
+            i, old = journal.pop()
+            data[i] = old
+
+    @contextmanager
+    def patched(self, pos: Tuple[int, int], value: Cell):
+        """
+        Temporarily overwrite one cell for the duration of a `with` block.
+        """
+        checkpoint = self.checkpoint()
+        self.set(pos[0], pos[1], value)
+        try:
+            yield self
+        finally:
+            self.undo(checkpoint)
+
+    def iter_find(self, value: Cell) -> Iterator[Tuple[int, int]]:
+        """
+        Yield the positions of all cells equal to `value`, in row-major order.
+        """
+        pattern = re.compile(re.escape(bytes([_byte(value)])))
+        end = (self.height - 1) * self.stride + self.width if self.height else 0
+        for match in pattern.finditer(self.data, 0, end):
+            r, c = divmod(match.start(), self.stride)
+            if c < self.width:
+                yield r, c
+
+    def find_all(self, value: Cell) -> List[Tuple[int, int]]:
+        return list(self.iter_find(value))
+
+    def find(self, value: Cell) -> Optional[Tuple[int, int]]:
+        return next(self.iter_find(value), None)
+
+    def lines(self) -> List[str]:
+        return [self.row(r).tobytes().decode() for r in range(self.height)]
+
+    def copy(self) -> "Grid":
+        data = bytearray()
+        for r in range(self.height):
+            data += self.row(r)
+        return Grid(data, self.width, self.height)
+
+    def to_numpy(self):
+        """
+        Return a (height, width) uint8 NumPy view of the cells. Requires numpy.
+        """
+        import numpy as np
+
+        flat = np.frombuffer(self.data, dtype=np.uint8)
+        if self.stride == self.width:
+            return flat[: self.height * self.width].reshape(self.shape)
+        return np.lib.stride_tricks.as_strided(
+            flat, shape=self.shape, strides=(self.stride, 1)
+        )
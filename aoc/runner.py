@@ -0,0 +1,209 @@
+import argparse
+import functools
+import importlib.util
+import pathlib
+import statistics
+import sys
+import time
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from aoc.cache import UncacheableError, load_cached
+
+repo_root = pathlib.Path(__file__).parent.parent.resolve()
+
+ENTRY_POINTS = ("parse", "part1", "part2")
+
+
+def find_days(year: str) -> List[int]:
+    """
+    List the days of a year that have a solution directory.
+
+    Args:
+        year (str): The year directory to look in, e.g. "2024".
+
+    Returns:
+        List[int]: The day numbers found, in ascending order.
+    """
+    days = []
+    for day_dir in repo_root.joinpath(year).glob("day*"):
+        suffix = day_dir.name[len("day") :]
+        if day_dir.is_dir() and suffix.isdigit():
+            days.append(int(suffix))
+    return sorted(days)
+
+
+def load_day(year: str, day: int, module: str = "main") -> ModuleType:
+    """
+    Import a day's solution module by path and check its entry points.
+
+    The day directory is put on `sys.path` so the module can import its
+    siblings the same way it does when run as a script.
+
+    Args:
+        year (str): The year directory, e.g. "2024".
+        day (int): The day number.
+        module (str, optional): The module file name without `.py`. Defaults to "main".
+
+    Returns:
+        ModuleType: The imported module.
+
+    Raises:
+        FileNotFoundError: If the module file does not exist.
+        AttributeError: If the module does not define `parse`, `part1` and `part2`.
+    """
+    day_dir = repo_root.joinpath(year, f"day{day}")
+    module_path = day_dir.joinpath(f"{module}.py")
+    if not module_path.exists():
+        raise FileNotFoundError(f"no solution module at {module_path}")
+
+    if str(day_dir) not in sys.path:
+        sys.path.insert(0, str(day_dir))
+
+    spec = importlib.util.spec_from_file_location(
+        f"aoc_{year}_day{day}_{module}", module_path
+    )
+    solution = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = solution
+    spec.loader.exec_module(solution)
+
+    missing = [
+        name for name in ENTRY_POINTS if not callable(getattr(solution, name, None))
+    ]
+    if missing:
+        raise AttributeError(f"{module_path} does not define {', '.join(missing)}")
+    return solution
+
+
+def time_call(fn: Callable, *args) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def summarize(samples: Sequence[float]) -> Tuple[float, float, float]:
+    """
+    Reduce a list of wall times to (min, median, p95).
+    """
+    if len(samples) == 1:
+        return samples[0], samples[0], samples[0]
+    p95 = statistics.quantiles(samples, n=20, method="inclusive")[-1]
+    return min(samples), statistics.median(samples), p95
+
+
+def run_day(
+    solution: ModuleType,
+    input_path: pathlib.Path,
+    repeat: int = 1,
+    cache_tag: Optional[str] = None,
+) -> Tuple[Dict[str, Any], Dict[str, List[float]]]:
+    """
+    Run parse, part1 and part2 `repeat` times and collect their wall times.
+
+    The input file is read once up front so that only parsing is timed.
+    Each repetition parses the text again and runs both parts on the result.
+    With `cache_tag`, the parse step instead goes through the parsed-input
+    cache, so its timing covers hashing the input and mapping the cache.
+
+    Returns:
+        Tuple containing:
+        - Dict: The answers from the first repetition, keyed by entry point
+        - Dict: The wall times in seconds, keyed by entry point
+    """
+    if cache_tag is None:
+        parse = functools.partial(solution.parse, input_path.read_text())
+    else:
+        parse = functools.partial(load_cached, input_path, solution.parse, cache_tag)
+
+    answers = {}
+    timings = {name: [] for name in ENTRY_POINTS}
+
+    for _ in range(repeat):
+        data, elapsed = time_call(parse)
+        timings["parse"].append(elapsed)
+        for part in ("part1", "part2"):
+            answer, elapsed = time_call(getattr(solution, part), data)
+            timings[part].append(elapsed)
+            answers.setdefault(part, answer)
+
+    return answers, timings
+
+
+def format_report(
+    title: str, answers: Dict[str, Any], timings: Dict[str, List[float]]
+) -> str:
+    lines = [title]
+    for part in ("part1", "part2"):
+        lines.append(f"  {part}: {answers[part]}")
+    for name in ENTRY_POINTS:
+        fastest, median, p95 = summarize(timings[name])
+        lines.append(
+            f"  {name:<6} min {fastest * 1e3:10.3f} ms"
+            f"  median {median * 1e3:10.3f} ms"
+            f"  p95 {p95 * 1e3:10.3f} ms"
+        )
+    return "\n".join(lines)
+
+
+def run(args: argparse.Namespace) -> int:
+    days = args.day or find_days(args.year)
+    if not days:
+        print(f"no days found for {args.year}", file=sys.stderr)
+        return 1
+
+    status = 0
+    for day in days:
+        try:
+            solution = load_day(args.year, day, args.module)
+        except (FileNotFoundError, AttributeError) as e:
+            print(f"{args.year} day {day}: {e}", file=sys.stderr)
+            status = 1
+            continue
+
+        input_path = args.input or repo_root.joinpath(
+            args.year, f"day{day}", "input.txt"
+        )
+        if not input_path.exists():
+            print(f"{args.year} day {day}: skipping, no input at {input_path}")
+            continue
+
+        cache_tag = f"{args.year}-day{day}-{args.module}" if args.cache else None
+        try:
+            answers, timings = run_day(solution, input_path, args.repeat, cache_tag)
+        except UncacheableError as e:
+            print(f"{args.year} day {day}: not caching, {e}")
+            answers, timings = run_day(solution, input_path, args.repeat)
+        title = f"{args.year} day {day} ({args.module}.py), {args.repeat} run(s)"
+        print(format_report(title, answers, timings))
+    return status
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(prog="aoc")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run and time solutions")
+    run_parser.add_argument("year", help="year directory, e.g. 2024")
+    run_parser.add_argument(
+        "--day", type=int, action="append", help="day to run (repeatable, default: all)"
+    )
+    run_parser.add_argument(
+        "--module", default="main", help="solution module in the day directory"
+    )
+    run_parser.add_argument(
+        "--repeat", type=int, default=1, help="number of timed repetitions"
+    )
+    run_parser.add_argument(
+        "--input", type=pathlib.Path, help="input file (default: the day's input.txt)"
+    )
+    run_parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="load parsed input from the binary cache next to the input",
+    )
+    run_parser.set_defaults(func=run)
+
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    sys.exit(args.func(args))